@@ -0,0 +1,28 @@
+import argparse
+import json
+from src.benchmark import HORIZONS, SIZES, run_benchmarks, write_benchmarks
+
+parser = argparse.ArgumentParser(
+    description="time model construction, stepping and data collection across a ladder of economy sizes and horizons"
+)
+parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+parser.add_argument("--horizons", nargs="+", type=int, default=HORIZONS)
+parser.add_argument("--household-engines", nargs="+", default=["vector"])
+parser.add_argument("--data-collections", nargs="+", default=["scan"])
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--output", default=None, help="json file, printed if not given")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        sizes=args.sizes,
+        horizons=args.horizons,
+        household_engines=args.household_engines,
+        data_collections=args.data_collections,
+        seed=args.seed,
+    )
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        write_benchmarks(report, args.output)
@@ -0,0 +1,32 @@
+import argparse
+from src.configuration import Configuration, DEFAULT_CONFIGURATION_PATH
+from src.ensemble import QUANTILES, run_ensemble
+
+parser = argparse.ArgumentParser(
+    description="run seeded replicas of the model across a process pool and report mean and quantile bands of each metric"
+)
+parser.add_argument("replicas", type=int)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--config", default=DEFAULT_CONFIGURATION_PATH)
+parser.add_argument("--processes", type=int, default=None, help="defaults to all cores")
+parser.add_argument("--household-engine", default="vector")
+parser.add_argument("--data-collection", default="incremental")
+parser.add_argument("--labels", nargs="+", default=None, help="defaults to every metric")
+parser.add_argument("--quantiles", nargs="+", type=float, default=QUANTILES)
+parser.add_argument("--output", default="ensemble.csv")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    bands, runs = run_ensemble(
+        args.replicas,
+        seed=args.seed,
+        config=Configuration.load(args.config),
+        processes=args.processes,
+        household_engine=args.household_engine,
+        data_collection=args.data_collection,
+        labels=args.labels,
+        quantiles=args.quantiles,
+    )
+    bands.to_csv(args.output)
+    print(runs.to_string())
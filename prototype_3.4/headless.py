@@ -0,0 +1,70 @@
+import argparse
+import json
+import time
+
+# only the standard library is imported up front, the model (and mesa, numpy,
+# pandas with it) once the arguments are known, so --help and bad arguments
+# return at once and the import can be timed. nothing from the server
+# (src.server, src.chart_stream, src.replay) is ever imported
+
+parser = argparse.ArgumentParser(
+    description="run the model once without the browser server and report how long importing, building and running it took"
+)
+parser.add_argument("--steps", type=int, default=None, help="defaults to TOTAL_STEPS")
+parser.add_argument("--config", default=None, help="defaults to src/configuration.yaml")
+parser.add_argument("--household-engine", default="vector")
+parser.add_argument("--data-collection", default="incremental")
+parser.add_argument("--seed", type=int, default=None)
+parser.add_argument("--labels", nargs="+", default=None, help="defaults to every metric")
+parser.add_argument("--output", default=None, help="csv of the collected metrics")
+
+
+def main(args):
+    start = time.perf_counter()
+    from src.configuration import Configuration, load_default_configuration
+    from src.model import MacroModel
+
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    config = (
+        Configuration.load(args.config)
+        if args.config is not None
+        else load_default_configuration()
+    )
+    model = MacroModel(
+        total_steps=args.steps,
+        household_engine=args.household_engine,
+        data_collection=args.data_collection,
+        config=config,
+        seed=args.seed,
+        labels=args.labels,
+    )
+    construction_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    error = None
+    try:
+        model.run_model()
+    except Exception as exception:
+        # bankruptcies and defaults end a run early, what was collected up to
+        # then is still written
+        error = repr(exception)
+    run_seconds = time.perf_counter() - start
+
+    if args.output is not None:
+        model.datacollector.get_model_vars_dataframe().to_csv(args.output)
+
+    steps = model.schedule.steps
+    return {
+        "import_seconds": import_seconds,
+        "construction_seconds": construction_seconds,
+        "run_seconds": run_seconds,
+        "steps_completed": steps,
+        "steps_per_second": steps / run_seconds if run_seconds else None,
+        "error": error,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,19 @@
+import argparse
+import json
+from src.benchmark import get_scaled_configuration
+from src.compact_agents import get_memory_report
+from src.configuration import Configuration, DEFAULT_CONFIGURATION_PATH
+from src.model import MacroModel
+
+parser = argparse.ArgumentParser(
+    description="bytes per agent with the default (dict) and compact (slots) agent classes"
+)
+parser.add_argument("--households", type=int, default=10_000)
+parser.add_argument("--config", default=DEFAULT_CONFIGURATION_PATH)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    _, config = get_scaled_configuration(Configuration.load(args.config), args.households)
+    report = get_memory_report(MacroModel, config=config)
+    print(json.dumps(report, indent=2))
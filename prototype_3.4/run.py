@@ -1,3 +1,15 @@
-from src.server import server
+import argparse
+from src.server import get_replay_server, get_server
 
-server.launch(open_browser=True)
+parser = argparse.ArgumentParser(description="run the model in the browser")
+parser.add_argument(
+    "--replay",
+    default=None,
+    help="show a stored run instead: a sweep.py results file or a metrics chunk directory",
+)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    server = get_server() if args.replay is None else get_replay_server(args.replay)
+    server.launch(open_browser=True)
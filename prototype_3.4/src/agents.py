@@ -1,73 +1,124 @@
 import mesa
-import random
-from src.utils import get, get_all, time_due, get_firm_type_string
-import yaml
+from src.utils import get, get_all, get_firm_type_string
+from src.aggregates import TrackedTotal
+from src.deposits import DepositBook
+from src.ledger import AccountBalance
+from src.loans import LoanBook
+from src.model_log import DEBUG, INFO, WARNING
 
-# load configuration file's variables
-with open("src/configuration.yaml", "r") as file:
-    data = yaml.safe_load(file)
-
-data["TOTAL_GOODS_PRODUCED"] = data["GOODS_PRODUCED"] + data["TOTAL_EXPORT_QUANTITY"]
+# months until a mortgage is paid off
+MORTGAGE_MONTHS = {"A": 3, "B": 6, "C": 9}
 
 
 class BaseAgent(mesa.Agent):
+    # attributes kept in the model's running group totals (see aggregates.py)
+    tracked_attributes = []
+    group_totals = None
+    # ledger account of the agent's money, for agents whose money is kept in
+    # the model's ledger
+    account = None
+
     def get_references(self):
         pass
 
+    def get_group_keys(self):
+        return [type(self)]
+
 
 class Bank(BaseAgent):
-    loan_ticks = data["LOAN_TICKS"]
-    monthly_interest_rate = data["MONTHLY_INTEREST_RATE"]
-    compound_interval = data["COMPOUND_INTERVAL"]
+    money = AccountBalance()
 
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
 
-        self.money = data["BANK_STARTING_MONEY"]
+        config = model.config
+        self.account = model.ledger.open_account(config.bank_starting_money)
 
-        self.loan_info = []
-        self.deposits = {}
+        self.loans = LoanBook(
+            config.loan_ticks, config.compound_interval, config.monthly_interest_rate
+        )
+        self.deposits = DepositBook(config.compound_interval)
+
+    def get_references(self):
+        # loans record households by index, into the list of Household agents
+        # or into the vector engine's HouseholdPopulation
+        if self.model.household_population is not None:
+            self.households = self.model.household_population
+        else:
+            self.households = get_all(self.model, Household)
 
     def loan(self, household, amount):
         household.money += amount
         self.money -= amount
-        self.loan_info.append({"household": household, "weeks": 0, "amount": amount})
-
-    def demand_loan(self, info):
-        if info["amount"] <= self.deposits[info["household"].unique_id]["amount"]:
-            self.money += info["amount"]
-            self.deposits[info["household"].unique_id]["amount"] -= info["amount"]
-        elif info["amount"] <= info["household"].money:
-            self.money += info["amount"]
-            info["household"].money -= info["amount"]
-        else:
-            print(
-                f"household {info['household'].unique_id} defaulted on loan of {info['amount']}, could only pay back {info['household'].money}"
+        self.loans.add(household.index, amount, self.model.schedule.time)
+
+    def loan_to_population(self, indices, amounts):
+        # vectorized loan for the households at indices of the vector engine
+        self.model.ledger.transfer_many(
+            self.account, self.households.get_accounts(indices), amounts
+        )
+        self.loans.add_many(indices, amounts, self.model.schedule.time)
+
+    def get_household(self, index):
+        # unique id and money of the household a loan was made to
+        if self.model.household_population is not None:
+            return (
+                int(self.households.unique_ids[index]),
+                float(self.households.money[index]),
             )
-            self.money += info["household"].money
-            info["household"].money = 0
+        household = self.households[index]
+        return household.unique_id, household.money
 
-        self.loan_info.remove(info)
+    def take_from_household(self, index, amount):
+        if self.model.household_population is not None:
+            self.households.money[index] -= amount
+        else:
+            self.households[index].money -= amount
+        self.money += amount
 
-    def deposit(self, household, amount):
-        if household.unique_id in self.deposits:
-            self.deposits[household.unique_id]["amount"] += amount
-            household.money -= amount
+    def demand_loan(self, row):
+        amount = float(self.loans.amount[row])
+        index = int(self.loans.household[row])
+        unique_id, money = self.get_household(index)
+        deposit = self.deposits.get(unique_id)
+
+        if deposit is not None and amount <= deposit:
+            self.money += amount
+            self.deposits.take(unique_id, amount)
+        elif amount <= money:
+            self.take_from_household(index, amount)
         else:
-            self.deposits[household.unique_id] = {
-                "amount": amount,
-                "start": household.model.schedule.time,
-            }
+            log = self.model.log
+            if log.enabled(WARNING):
+                log.emit(
+                    WARNING,
+                    "loan default",
+                    self.model.schedule.time,
+                    household=unique_id,
+                    amount=amount,
+                    paid_back=money,
+                )
+            self.take_from_household(index, money)
+
+        self.loans.remove(row)
+
+    def deposit(self, household, amount):
+        self.add_deposit(household.unique_id, amount)
+        household.money -= amount
+
+    def add_deposit(self, unique_id, amount):
+        self.deposits.add(unique_id, amount, self.model.schedule.time)
 
     def withdraw(self, household, amount):
-        if household.unique_id in self.deposits:
+        deposit = self.deposits.get(household.unique_id)
+        if deposit is not None:
             if amount == "all":
-                household.money += self.deposits[household.unique_id]["amount"]
-                self.deposits[household.unique_id]["amount"] = 0
+                household.money += float(deposit)
+                self.deposits.take(household.unique_id, deposit)
                 return
-            if amount < self.deposits[household.unique_id]["amount"]:
+            if amount < deposit:
                 household.money += amount
-                self.deposits[household.unique_id]["amount"] -= amount
+                self.deposits.take(household.unique_id, amount)
                 return
             raise Exception("household is withdrawing more money than it can")
         raise Exception(
@@ -75,50 +126,53 @@ class Bank(BaseAgent):
         )
 
     def step(self):
-        for info in self.loan_info:
-            info["weeks"] += 1
-            if info["weeks"] % self.compound_interval == 0:
-                info["amount"] *= 1 + self.monthly_interest_rate
-            if info["weeks"] > self.loan_ticks:
-                self.demand_loan(info)
-        for info in self.deposits.values():
-            if time_due(self.model, info["start"], self.compound_interval):
-                compound_addition = info["amount"] * self.monthly_interest_rate
-                if self.money > compound_addition:
-                    self.money -= compound_addition
-                    info["amount"] += compound_addition
-                else:
-                    raise Exception("bank defaulted :(")
+        time = self.model.schedule.time
+        self.loans.compound(time)
+        for row in self.loans.pop_due(time):
+            self.demand_loan(row)
+        self.compound_deposits(time)
+
+    def compound_deposits(self, time):
+        # the deposits made in phase with this tick grow by the interest rate,
+        # as long as the bank can cover all of them
+        rows = self.deposits.get_due_rows(time)
+        if len(rows) == 0:
+            return
+        compound_additions = (
+            self.deposits.amount[rows] * self.model.config.monthly_interest_rate
+        )
+        total_addition = compound_additions.sum()
+        if self.money > total_addition:
+            self.money -= total_addition
+            self.deposits.add_to_rows(rows, compound_additions)
+        else:
+            raise Exception("bank defaulted :(")
 
 
 class Household(BaseAgent):
-    rent_interval = data["RENT_INTERVAL"]
-    mortgage_interval = data["MORTGAGE_INTERVAL"]
-    utilities_interval = data["UTILITIES_INTERVAL"]
-    goods_interval = data["GOODS_INTERVAL"]
-
-    house_cost = data["HOUSE_COST"]
-    rent_cost = data["RENT_COST"]
-    utilities_cost = data["UTILITIES_COST"]
-    mortgage_cost = data["MORTGAGE_COST"]
-    weekly_goods_consumption = data["WEEKLY_GOODS_CONSUMPTION"]
-    weekly_goods_consumption_range = data["WEEKLY_GOODS_CONSUMPTION_RANGE"]
-    monthly_mortgage_rate = data["MONTHLY_MORTGAGE_RATE"]
-    weekly_temporal_discount_rate = data["WEEKLY_TEMPORAL_DISCOUNT_RATE"]
-
-    def __init__(self, unique_id, model, education):
+    money = TrackedTotal()
+    goods = TrackedTotal()
+    tracked_attributes = ["money", "goods"]
+
+    def __init__(self, unique_id, model, education, index):
         super().__init__(unique_id, model)
         self.education = education
+        # position among the model's households
+        self.index = index
 
         self.model = model
 
-        self.money = data["HOUSEHOLD_STARTING_MONEY"]
-        self.goods = data["HOUSEHOLD_STARTING_GOODS"]
+        self.money = model.config.household_starting_money
+        self.goods = model.config.household_starting_goods
 
-        self.strategy = data["HOUSEHOLD_STARTING_STRATEGY"]
-        self.strategy_start = 0
+        self.strategy_events = []
+        self.set_strategy(model.config.household_starting_strategy, 0, False)
         self.employed = False
         self.employer = None
+        model.labor_market.add(self, education)
+
+    def get_group_keys(self):
+        return [Household, (Household, self.education)]
 
     def get_references(self):
         self.bank = get(self.model, Bank)
@@ -132,20 +186,16 @@ class Household(BaseAgent):
 
 
     def set_goods_requirement(self):
-        lower_bound = (
-            self.weekly_goods_consumption - self.weekly_goods_consumption_range
-        )
-        upper_bound = (
-            self.weekly_goods_consumption + self.weekly_goods_consumption_range
-        )
-
-        self.goods_requirement = random.uniform(lower_bound, upper_bound)
+        # the model draws every household's requirement in one call, before
+        # the households take theirs in order (see MacroModel.draw_households)
+        self.goods_requirement = self.model.goods_requirement_draws.item(self.index)
 
     def buy_imported_goods(self):
-        quantity = data["TOTAL_IMPORT_QUANTITY"] / data["NUM_HOUSEHOLDS"]
+        config = self.model.config
+        quantity = config.total_import_quantity / config.num_households
 
         self.goods_requirement -= quantity
-        amount = data["IMPORT_PRICE"] * quantity * self.government.compounded_inflation_rate
+        amount = config.import_price * quantity * self.government.compounded_inflation_rate
 
         self.money -= amount
         self.model.total_money -= amount
@@ -153,68 +203,91 @@ class Household(BaseAgent):
     def get_goods_requirement(self):
         return max(self.goods_requirement - self.goods, 0)
 
+    def set_strategy(self, strategy, start, skip_first_payment):
+        # switch strategy and put its payments (and a mortgage's pay off) on
+        # the model's event calendar. a strategy changed during this
+        # household's step skips the payment at start, like time_due polling
+        # did, since the payments for this tick have already been made
+        schedule = self.model.schedule
+        config = self.model.config
+
+        for event in self.strategy_events:
+            schedule.cancel(event)
+        self.strategy_events = []
+
+        self.strategy = strategy
+        self.strategy_start = start
+
+        if strategy == "rent":
+            interval, payment = config.rent_interval, self.pay_rent
+        elif strategy[:8] == "mortgage":
+            interval, payment = config.mortgage_interval, self.pay_mortgage
+        elif strategy == "own house":
+            interval, payment = config.utilities_interval, self.pay_utilities
+        else:
+            return
+
+        first_payment = start + interval if skip_first_payment else start
+        self.strategy_events.append(
+            schedule.schedule_periodic(first_payment, interval, payment, self)
+        )
+        if strategy[:8] == "mortgage":
+            self.strategy_events.append(
+                schedule.schedule_event(
+                    start + 4 * MORTGAGE_MONTHS[strategy[9]],
+                    self.pay_off_mortgage,
+                    self,
+                    order=1,
+                )
+            )
+
+    def pay_off_mortgage(self):
+        self.set_strategy("own house", self.model.schedule.time, True)
+
     def pay_rent(self):
-        self.money -= self.rent_cost
-        self.bank.money += self.rent_cost - self.utilities_cost
+        config = self.model.config
+        self.money -= config.rent_cost
+        self.bank.money += config.rent_cost - config.utilities_cost
         # bank should pay 20% of the rent to the government
-        self.government.money += self.utilities_cost
+        self.government.money += config.utilities_cost
 
     def pay_utilities(self):
-        self.money -= self.utilities_cost
-        self.government.money += self.utilities_cost
+        self.money -= self.model.config.utilities_cost
+        self.government.money += self.model.config.utilities_cost
 
     def pay_mortgage(self):
-        mortgage_after_interest = self.mortgage_cost * (
-            1 + self.monthly_morgage_rate
+        config = self.model.config
+        mortgage_after_interest = config.mortgage_cost * (
+            1 + config.monthly_mortgage_rate
         ) ** ((self.model.schedule.time - self.strategy_start) / 4)
         self.money -= mortgage_after_interest
-        self.bank.money += mortgage_after_interest - self.utilities_cost
-        self.government.money += self.utilities_cost
+        self.bank.money += mortgage_after_interest - config.utilities_cost
+        self.government.money += config.utilities_cost
 
     def buy_house(self):
         self.bank.withdraw(self, "all")
         if self.money >= 360:
-            self.strategy = "own house"
+            strategy = "own house"
             self.money -= 360
         elif self.money >= 270:
-            self.strategy = "mortgage A"
+            strategy = "mortgage A"
             self.money -= 270
         elif self.money >= 180:
-            self.strategy = "mortgage B"
+            strategy = "mortgage B"
             self.money -= 180
         elif self.money >= 90:
-            self.strategy = "mortgage C"
+            strategy = "mortgage C"
             self.money -= 90
         else:
             raise Exception(
                 "household agent does not have enough money to buy house :("
             )
-        self.strategy_start = self.model.schedule.time
+        self.set_strategy(strategy, self.model.schedule.time, True)
 
     def step(self):
-        if self.strategy == "rent" and time_due(
-            self.model, self.strategy_start, self.rent_interval
-        ):
-            self.pay_rent()
-
-        if self.strategy[:8] == "mortgage" and time_due(
-            self.model, self.strategy_start, self.mortgage_interval
-        ):
-            self.pay_mortgage()
-
-        if self.strategy == "own house" and time_due(
-            self.model, self.strategy_start, self.utilities_interval
-        ):
-            self.pay_utilities()
-
-        if self.strategy[:8] == "mortgage":
-            if (self.model.schedule.time - self.strategy_start) / 4 >= {
-                "A": 3,
-                "B": 6,
-                "C": 9,
-            }[self.strategy[9]]:
-                self.strategy = "own house"
-                self.strategy_start = self.model.schedule.time
+        # rent, mortgage or utilities payments that are due, then paying off a
+        # mortgage that has run its course
+        self.model.schedule.run_due_events(self)
 
         if self.money > 15 and self.strategy == "rent":
             self.bank.deposit(self, self.money - 15)
@@ -245,16 +318,20 @@ class Household(BaseAgent):
 
 
 class Government(BaseAgent):
-    inflation_interval = data["INFLATION_INTERVAL"]
+    money = AccountBalance()
 
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
 
-        self.money = data["GOVERNMENT_STARTING_MONEY"]
+        self.account = model.ledger.open_account(model.config.government_starting_money)
         self.total_money_provided = 0
 
         self.compounded_inflation_rate = 1
 
+        model.schedule.schedule_periodic(
+            0, model.config.inflation_interval, self.compound_inflation, self
+        )
+
     def get_references(self):
         self.initial_total_money = self.model.total_money
 
@@ -264,18 +341,38 @@ class Government(BaseAgent):
         self.model.total_money += amount
         self.total_money_provided += amount
 
+    def provide_money_to_population(
+        self, accounts, price, weekly_temporal_discount_rate, quantities
+    ):
+        # provide_money for the vector engine's households at ledger accounts
+        amounts = price * (1 - weekly_temporal_discount_rate) * quantities
+        self.model.ledger.credit_many(accounts, amounts)
+        total_amount = amounts.sum()
+        self.model.total_money += total_amount
+        self.total_money_provided += total_amount
+
     def get_inflation_factor(self):
         return 1 + (self.total_money_provided / self.initial_total_money)
 
+    def compound_inflation(self):
+        self.compounded_inflation_rate *= self.get_inflation_factor()
+        log = self.model.log
+        if log.enabled(INFO):
+            log.emit(
+                INFO,
+                "inflation",
+                self.model.schedule.time,
+                compounded_inflation_rate=self.compounded_inflation_rate,
+            )
+
     def step(self):
-        if time_due(self.model, 0, self.inflation_interval):
-            self.compounded_inflation_rate *= self.get_inflation_factor()
-            print("\ninflation rate:", self.compounded_inflation_rate, "\n")
+        self.model.schedule.run_due_events(self)
 
 
 class Firm(BaseAgent):
-    goods_interval = data["GOODS_INTERVAL"]
-    wages_interval = data["WAGES_INTERVAL"]
+    money = TrackedTotal()
+    goods = TrackedTotal()
+    tracked_attributes = ["money", "goods"]
 
     @property
     def goods_cost(self):
@@ -285,42 +382,85 @@ class Firm(BaseAgent):
         super().__init__(unique_id, model)
         self.employee_counts = [0, 0, 0]
         self.employees = [[] for _ in range(3)]
+        # fraction_production and employee_fraction_production only change
+        # with the workforce, so they are kept until a hire or fire
+        self.production_fraction = None
+        self.wage_shares = None
 
         self.monthly_inflation_rate_sum = 0
 
+        schedule = model.schedule
+        schedule.schedule_event(0, self.init_employees, self)
+        schedule.schedule_periodic(
+            0, model.config.goods_interval, self.trade_goods, self, order=1
+        )
+        schedule.schedule_periodic(
+            3, model.config.wages_interval, self.pay_month_wages, self, order=2
+        )
+
     def get_references(self):
-        self.households = get_all(self.model, Household)
+        if self.model.household_population is not None:
+            self.households = self.model.household_population
+        else:
+            self.households = get_all(self.model, Household)
         self.government = get(self.model, Government)
 
     def hire_employee(self, education):
         if self.employees[education] == self.required_employees[education]:
-            print(
-                f"Warning: employees of education level {education} is already at max for firm {self}"
-            )
-        for worker in self.households:
-            if worker.education == education and worker.employed == False:
-                worker.employed = True
-                worker.employer = self
-                self.employee_counts[education] += 1
-                self.employees[education].append(worker)
-                return
+            log = self.model.log
+            if log.enabled(WARNING):
+                log.emit(
+                    WARNING,
+                    "hiring over requirement",
+                    self.model.schedule.time,
+                    firm=self.unique_id,
+                    education=education,
+                )
+        worker = self.model.labor_market.hire(education)
+        if worker is None:
+            return
+        if self.model.household_population is not None:
+            self.households.employ(worker, self)
+        else:
+            worker.employed = True
+            worker.employer = self
+        self.employee_counts[education] += 1
+        self.employees[education].append(worker)
+        self.clear_workforce_cache()
+
+    def fire_employee(self, worker, education):
+        self.employees[education].remove(worker)
+        self.employee_counts[education] -= 1
+        self.clear_workforce_cache()
+        if self.model.household_population is not None:
+            self.households.unemploy(worker)
+        else:
+            worker.employed = False
+            worker.employer = None
+        self.model.labor_market.release(worker, education)
 
     def init_employees(self):
         for education, count in enumerate(self.required_employees):
             for _ in range(count):
                 self.hire_employee(education)
 
+    def clear_workforce_cache(self):
+        self.production_fraction = None
+        self.wage_shares = None
+
     def fraction_production(self):
-        number_required = len(self.required_employees) - self.required_employees.count(
-            0
-        )
-        fraction = sum(
-            self.employee_counts[education] / requirement
-            for education, requirement in enumerate(self.required_employees)
-            if not requirement == 0
-        )
+        if self.production_fraction is None:
+            number_required = len(
+                self.required_employees
+            ) - self.required_employees.count(0)
+            fraction = sum(
+                self.employee_counts[education] / requirement
+                for education, requirement in enumerate(self.required_employees)
+                if not requirement == 0
+            )
+            self.production_fraction = fraction / number_required
 
-        return fraction / number_required
+        return self.production_fraction
 
     def employee_fraction_production(self, education):
         if self.employee_counts[education] == 0:
@@ -328,76 +468,108 @@ class Firm(BaseAgent):
                 "warning: attempting to find the fraction of product of a worker that does not exist"
             )
 
+        if self.wage_shares is None:
+            self.wage_shares = [
+                share / requirement if requirement else None
+                for share, requirement in zip(
+                    self.model.config.share_of_production_capacity,
+                    self.required_employees,
+                )
+            ]
+        return self.wage_shares[education]
+
+    def get_wage(self, education):
+        # what every worker of an education level earns for the month
         return (
-            data["SHARE_OF_PRODUCTION_CAPACITY"][education]
-            / self.required_employees[education]
+            self.month_goods_quantity
+            * self.model.config.value_added
+            * self.employee_fraction_production(education)
+            * (self.monthly_inflation_rate_sum / 4)
         )
 
     def pay_wages(self):
-        print(
-            "firm:",
-            self,
-            "month_good_quantity:",
-            self.month_goods_quantity,
-            "monthly_inflation_rate_sum:",
-            self.monthly_inflation_rate_sum,
-            "money:",
-            self.money,
-        )
-    
-        total_wages = 0
+        money_before = self.money
 
-        for education_class in self.employees:
+        for education, education_class in enumerate(self.employees):
+            if not education_class:
+                continue
+            wage = self.get_wage(education)
+            if self.money < wage * len(education_class):
+                raise Exception(f"Firm {self} defaulted. ID: {self.unique_id}")
+
+            if self.model.household_population is not None:
+                # workers are household indices here
+                self.households.pay_wages(self, education_class, wage)
+                continue
+
+            # the firm's side of the level's wages is posted once
             for worker in education_class:
-                wage = (
-                    self.month_goods_quantity
-                    * data["VALUE_ADDED"]
-                    * self.employee_fraction_production(worker.education)
-                    * (self.monthly_inflation_rate_sum / 4)
-                )
-                
-                if self.money < wage:
-                    raise Exception(f"Firm {self} defaulted. ID: {self.unique_id}")
                 worker.money += wage
-                self.money -= wage
+            self.money -= wage * len(education_class)
+
+        self.log_wages(money_before)
+
+    def log_wages(self, money_before):
+        log = self.model.log
+        if log.enabled(DEBUG):
+            log.emit(
+                DEBUG,
+                "wages paid",
+                self.model.schedule.time,
+                firm=self.unique_id,
+                month_goods_quantity=self.month_goods_quantity,
+                monthly_inflation_rate_sum=self.monthly_inflation_rate_sum,
+                money_before=money_before,
+                money=self.money,
+            )
 
-                total_wages += wage
+    def get_customer_goods_requirements(self):
+        return [customer.get_goods_requirement() for customer in self.customers]
 
-        print(f"new money: {self.money}")
+    def get_customer_goods_requirement(self):
+        return sum(self.customer_goods_requirements)
 
-    def get_goods_requirement(self):
-        return max(
-            sum([customer.get_goods_requirement() for customer in self.customers])
+    def aggregate_demand(self):
+        # called once a tick by MacroModel.aggregate_demand, after every customer
+        # of this firm has aggregated its own demand. nothing a customer needs
+        # changes before this firm sells to it, so the same values are used by
+        # acquire_goods and sell_goods for the rest of the tick
+        self.customer_goods_requirements = self.get_customer_goods_requirements()
+        self.goods_demand = max(
+            self.get_customer_goods_requirement()
             - self.goods
             + (self.export_quantity if isinstance(self, SmallFirm) else 0)
             + 1e-8,  # for rounding problem preventation
             0,
         )
 
+    def get_goods_requirement(self):
+        return self.goods_demand
+
     def sell_goods(self):
         total_quantity = 0
+        total_price = 0
+        # neither changes while selling
+        unit_price = self.goods_cost * self.fraction_production()
 
-        for customer in self.customers:
-            quantity = customer.get_goods_requirement()
+        for customer, quantity in zip(
+            self.customers, self.customer_goods_requirements
+        ):
 
             if isinstance(self, SmallFirm):
                 self.government.provide_money(
                     customer,
                     self.goods_cost,
-                    customer.weekly_temporal_discount_rate,
+                    self.model.config.weekly_temporal_discount_rate,
                     quantity,
                 )
 
-            price = (
-                self.goods_cost
-                * self.fraction_production()
-                * quantity
-            )
+            price = unit_price * quantity
 
             if customer.money < price:
                 raise Exception(f"customer {customer} went bankrupt")
             customer.money -= price
-            self.money += price
+            total_price += price
 
             if self.goods < quantity:
                 raise Exception(f"supplier {self} doesnt have enough goods to provide")
@@ -407,10 +579,12 @@ class Firm(BaseAgent):
 
             total_quantity += quantity
 
+        # the firm's revenue is posted once, nothing reads it while selling
+        self.money += total_price
         return total_quantity
     
     def update_baseline(self): # FOR LANDON AND SWAIN: HERE IS WHERE THE BASELINE MONEY IS BEING CHANGED
-        new_baseline = data["FIRM_STARTING_MONEY"][get_firm_type_string(self)] * self.government.compounded_inflation_rate
+        new_baseline = self.model.config.firm_starting_money[get_firm_type_string(self)] * self.government.compounded_inflation_rate
         amount_added = new_baseline - self.baseline
 
         self.money += amount_added
@@ -419,40 +593,42 @@ class Firm(BaseAgent):
 
         self.baseline = new_baseline
 
+    def trade_goods(self):
+        self.month_goods_quantity += self.sell_goods() + (
+            0 if not isinstance(self, SmallFirm) else self.export()
+        )
+        self.monthly_inflation_rate_sum += self.government.compounded_inflation_rate
+
+    def pay_month_wages(self):
+        self.pay_wages()
+        self.month_goods_quantity = 0
+        self.monthly_inflation_rate_sum = 0
+
     def step(self):
         if isinstance(self, LargeFirm):
             self.acquire_goods()
 
-        if self.model.schedule.time == 0:
-            self.init_employees()
-
-        if time_due(self.model, 0, self.goods_interval):
-            self.month_goods_quantity += self.sell_goods() + (
-                0 if not isinstance(self, SmallFirm) else self.export()
-            )
-            self.monthly_inflation_rate_sum += self.government.compounded_inflation_rate
-
-        if time_due(self.model, 3, self.wages_interval):
-            self.pay_wages()
-            self.month_goods_quantity = 0
-            self.monthly_inflation_rate_sum = 0
+        # hiring on the first tick, then selling goods and paying wages as
+        # they come due
+        self.model.schedule.run_due_events(self)
 
         self.update_baseline()
 
 
 class LargeFirm(Firm):
-    base_goods_cost = data["VALUE_ADDED"]
-
-    required_employees = data["REQUIRED_EMPLOYEES"]["LARGE"]
-    goods_requirement = data["TOTAL_GOODS_PRODUCED"]
-    export_quantity = data["TOTAL_EXPORT_QUANTITY"]
-
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
+        config = model.config
 
-        self.money = data["FIRM_STARTING_MONEY"]["LARGE"]
+        self.base_goods_cost = config.value_added
+
+        self.required_employees = config.required_employees.large
+        self.goods_requirement = config.total_goods_produced
+        self.export_quantity = config.total_export_quantity
+
+        self.money = config.firm_starting_money.large
         self.baseline = self.money
-        self.goods = data["FIRM_STARTING_GOODS"]["LARGE"]
+        self.goods = config.firm_starting_goods.large
 
         self.month_goods_quantity = 0
 
@@ -465,18 +641,20 @@ class LargeFirm(Firm):
 
 
 class MediumFirm(Firm):
-    base_goods_cost = LargeFirm.base_goods_cost + data["VALUE_ADDED"]
-
-    required_employees = data["REQUIRED_EMPLOYEES"]["MEDIUM"]
-    goods_requirement = LargeFirm.goods_requirement / data["NUM_FIRMS"]["MEDIUM"]
-    export_quantity = data["TOTAL_EXPORT_QUANTITY"] / data["NUM_FIRMS"]["MEDIUM"]
-
     def __init__(self, unique_id, model, customer_range):
         super().__init__(unique_id, model)
+        config = model.config
+
+        # large firm cost plus this firm's value added
+        self.base_goods_cost = config.value_added + config.value_added
+
+        self.required_employees = config.required_employees.medium
+        self.goods_requirement = config.total_goods_produced / config.num_firms.medium
+        self.export_quantity = config.total_export_quantity / config.num_firms.medium
 
-        self.money = data["FIRM_STARTING_MONEY"]["MEDIUM"]
+        self.money = config.firm_starting_money.medium
         self.baseline = self.money
-        self.goods = data["FIRM_STARTING_GOODS"]["MEDIUM"]
+        self.goods = config.firm_starting_goods.medium
         self.customer_range = customer_range
 
         self.month_goods_quantity = 0
@@ -489,17 +667,20 @@ class MediumFirm(Firm):
 
 
 class SmallFirm(Firm):
-    base_goods_cost = MediumFirm.base_goods_cost + data["VALUE_ADDED"]
-
-    required_employees = data["REQUIRED_EMPLOYEES"]["SMALL"]
-    goods_requirement = LargeFirm.goods_requirement / data["NUM_FIRMS"]["SMALL"]
-    export_quantity = data["TOTAL_EXPORT_QUANTITY"] / data["NUM_FIRMS"]["SMALL"]
-
     def __init__(self, unique_id, model, customer_range):
         super().__init__(unique_id, model)
-        self.money = data["FIRM_STARTING_MONEY"]["SMALL"]
+        config = model.config
+
+        # medium firm cost plus this firm's value added
+        self.base_goods_cost = config.value_added + config.value_added + config.value_added
+
+        self.required_employees = config.required_employees.small
+        self.goods_requirement = config.total_goods_produced / config.num_firms.small
+        self.export_quantity = config.total_export_quantity / config.num_firms.small
+
+        self.money = config.firm_starting_money.small
         self.baseline = self.money
-        self.goods = data["FIRM_STARTING_GOODS"]["SMALL"]
+        self.goods = config.firm_starting_goods.small
         self.customer_range = customer_range
 
         self.month_goods_quantity = 0
@@ -509,17 +690,38 @@ class SmallFirm(Firm):
 
     def get_references(self):
         super().get_references()
-        self.customers = get_all(self.model, Household)[
-            self.customer_range[0] : self.customer_range[1]
-        ]
+        if self.model.household_population is not None:
+            self.customers = slice(self.customer_range[0], self.customer_range[1])
+        else:
+            self.customers = get_all(self.model, Household)[
+                self.customer_range[0] : self.customer_range[1]
+            ]
         self.government = get(self.model, Government)
 
+    def get_customer_goods_requirements(self):
+        if self.model.household_population is not None:
+            return self.households.get_goods_requirement(self.customers)
+        return super().get_customer_goods_requirements()
+
+    def get_customer_goods_requirement(self):
+        if self.model.household_population is not None:
+            return self.customer_goods_requirements.sum()
+        return super().get_customer_goods_requirement()
+
+    def sell_goods(self):
+        if self.model.household_population is not None:
+            return self.households.buy_goods(
+                self, self.customers, self.customer_goods_requirements
+            )
+        return super().sell_goods()
+
     def export(self):
         if self.goods < self.export_quantity:
-            print("small firm goods:", self.goods)
-            raise Exception(f"small firm {self} doesn't have enough goods to export")
+            raise Exception(
+                f"small firm {self} doesn't have enough goods to export (has {self.goods})"
+            )
 
-        amount = self.export_quantity * data["EXPORT_PRICE"] * self.government.compounded_inflation_rate
+        amount = self.export_quantity * self.model.config.export_price * self.government.compounded_inflation_rate
         self.money += amount
         self.model.total_money += amount
         self.goods -= self.export_quantity
@@ -0,0 +1,106 @@
+from collections import defaultdict
+from functools import partial
+from mesa.datacollection import DataCollector
+
+
+class TrackedTotal:
+    # an agent attribute (money, goods) whose changes are added to the model's
+    # running group totals. it only defines __set__, so reading the attribute
+    # is a plain instance dict lookup
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __set__(self, agent, value):
+        if agent.group_totals is not None:
+            agent.group_totals.change(
+                agent, self.name, value - agent.__dict__[self.name]
+            )
+        agent.__dict__[self.name] = value
+
+
+class SlottedTrackedTotal(TrackedTotal):
+    # TrackedTotal for agents with __slots__ (see compact_agents.py), which
+    # keeps the value in the "_" + name slot instead of the instance dict
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot_name = "_" + name
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        return getattr(agent, self.slot_name)
+
+    def __set__(self, agent, value):
+        if agent.group_totals is not None:
+            agent.group_totals.change(
+                agent, self.name, value - getattr(agent, self.slot_name)
+            )
+        setattr(agent, self.slot_name, value)
+
+
+class GroupTotals:
+    # running sums of the tracked attributes and agent counts for every group
+    # (an agent class, or a (class, education) pair for households), so
+    # averages and totals are O(1) to report
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.sums = defaultdict(partial(defaultdict, float))
+
+    def add(self, agent):
+        if not agent.tracked_attributes:
+            return
+        agent.group_keys = agent.get_group_keys()
+        for key in agent.group_keys:
+            self.counts[key] += 1
+            for name in agent.tracked_attributes:
+                self.sums[name][key] += getattr(agent, name)
+        agent.group_totals = self
+
+    def remove(self, agent):
+        if agent.group_totals is not self:
+            return
+        for key in agent.group_keys:
+            self.counts[key] -= 1
+            for name in agent.tracked_attributes:
+                self.sums[name][key] -= getattr(agent, name)
+        agent.group_totals = None
+
+    def change(self, agent, name, amount):
+        sums = self.sums[name]
+        for key in agent.group_keys:
+            sums[key] += amount
+
+    def set(self, key, count, **sums):
+        # overwrite a group outright, for agents whose attributes are arrays
+        # (see HouseholdPopulation.get_group_totals)
+        self.counts[key] = count
+        for name, total in sums.items():
+            self.sums[name][key] = total
+
+    def get_total(self, key, name):
+        return self.sums[name][key]
+
+    def get_avg(self, key, name):
+        return self.sums[name][key] / self.counts[key]
+
+
+class IncrementalDataCollector(DataCollector):
+    # DataCollector whose reporters read model.group_totals. array backed
+    # households can't report their changes one by one, so their groups are
+    # recomputed once per collect (one pass over the columns for all groups),
+    # unless no reporter reads them
+
+    def __init__(self, model_reporters=None, read_households=True):
+        super().__init__(model_reporters)
+        self.read_households = read_households
+
+    def collect(self, model):
+        if self.read_households and model.household_population is not None:
+            for key, (count, sums) in (
+                model.household_population.get_group_totals().items()
+            ):
+                model.group_totals.set(key, count, **sums)
+        super().collect(model)
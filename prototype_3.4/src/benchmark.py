@@ -0,0 +1,158 @@
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from src.configuration import Configuration, DEFAULT_CONFIGURATION_PATH
+from src.model import MacroModel
+from src.profiling import StepProfiler
+
+# nominal household counts, the real count is the nearest multiple of the
+# base configuration's 84 so every firm gets a whole number of customers
+SIZES = {"84": 84, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+HORIZONS = [100, 1000, 5000]
+
+
+def get_scaled_configuration(config, households):
+    # the base economy repeated scale times: every small and medium firm keeps
+    # its customers and employees, the single large firm (which sells to every
+    # medium firm) grows with the economy, and so do the bank and government
+    scale = max(1, round(households / config.num_households))
+    return scale, config.with_overrides(
+        {
+            "NUM_HOUSEHOLDS": config.num_households * scale,
+            "EDUCATION_COUNTS": [count * scale for count in config.education_counts],
+            "NUM_FIRMS.SMALL": config.num_firms.small * scale,
+            "NUM_FIRMS.MEDIUM": config.num_firms.medium * scale,
+            "REQUIRED_EMPLOYEES.LARGE": [
+                count * scale for count in config.required_employees.large
+            ],
+            "FIRM_STARTING_MONEY.LARGE": config.firm_starting_money.large * scale,
+            "FIRM_STARTING_GOODS.LARGE": config.firm_starting_goods.large * scale,
+            "GOODS_PRODUCED": config.goods_produced * scale,
+            "TOTAL_EXPORT_QUANTITY": config.total_export_quantity * scale,
+            "TOTAL_IMPORT_QUANTITY": config.total_import_quantity * scale,
+            "BANK_STARTING_MONEY": config.bank_starting_money * scale,
+            "GOVERNMENT_STARTING_MONEY": config.government_starting_money * scale,
+        }
+    )
+
+
+def get_benchmark_configuration(config, households, horizon):
+    # the scaled economy, changed so that it lasts the whole horizon and every
+    # case times the same amount of work per tick. inflation compounds the
+    # money the government has provided since the start, which runs away and
+    # bankrupts the economy within a few dozen ticks, so here it only
+    # compounds on tick 0. and the lowest paid households spend a little more
+    # than they earn, so they start with ten times the money, enough for well
+    # over 5000 ticks
+    scale, config = get_scaled_configuration(config, households)
+    return scale, config.with_overrides(
+        {
+            "INFLATION_INTERVAL": horizon + 1,
+            "HOUSEHOLD_STARTING_MONEY": config.household_starting_money * 10,
+        }
+    )
+
+
+def get_peak_rss_mb():
+    # ru_maxrss is in kilobytes on linux and bytes on macos
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_case(case):
+    config = Configuration.load(case["base"])
+    scale, config = get_benchmark_configuration(
+        config, case["households"], case["horizon"]
+    )
+
+    start = time.perf_counter()
+    # only data collection is timed, so the steps run at full speed
+    profiler = StepProfiler(methods=[], model_methods=["collect"])
+    model = MacroModel(
+        total_steps=case["horizon"],
+        household_engine=case["household_engine"],
+        data_collection=case["data_collection"],
+        config=config,
+        profiler=profiler,
+        seed=case["seed"],
+    )
+    construction_seconds = time.perf_counter() - start
+
+    error = None
+    start = time.perf_counter()
+    try:
+        model.run_model()
+    except Exception as exception:
+        # steps_completed and error say how far a run that fails anyway got
+        error = repr(exception)
+    run_seconds = time.perf_counter() - start
+
+    steps = model.schedule.steps
+    return {
+        **{key: value for key, value in case.items() if key != "base"},
+        "households": config.num_households,
+        "scale": scale,
+        "construction_seconds": construction_seconds,
+        "steps_completed": steps,
+        "run_seconds": run_seconds,
+        "steps_per_second": steps / run_seconds if run_seconds > 0 else None,
+        "collection_seconds": float(profiler.get_dataframe()["seconds"].sum()),
+        "peak_rss_mb": get_peak_rss_mb(),
+        "error": error,
+    }
+
+
+def run_benchmarks(
+    sizes=tuple(SIZES),
+    horizons=tuple(HORIZONS),
+    household_engines=("vector",),
+    data_collections=("scan",),
+    base=DEFAULT_CONFIGURATION_PATH,
+    seed=0,
+):
+    cases = [
+        {
+            "size": size,
+            "households": SIZES[size],
+            "horizon": horizon,
+            "household_engine": household_engine,
+            "data_collection": data_collection,
+            "seed": seed,
+            "base": base,
+        }
+        for size in sizes
+        for horizon in horizons
+        for household_engine in household_engines
+        for data_collection in data_collections
+    ]
+
+    results = []
+    # a fresh process per case, so peak rss is that case's alone
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_case, (case,))
+        results.append(result)
+        print(
+            f"{result['size']} households ({result['household_engine']}, {result['data_collection']}),"
+            f" {result['steps_completed']}/{result['horizon']} steps:"
+            f" built in {result['construction_seconds']:.2f}s,"
+            f" {result['steps_per_second']:.1f} steps/s,"
+            f" {result['peak_rss_mb']:.0f}MB peak",
+            file=sys.stderr,
+        )
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+
+def write_benchmarks(report, path):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
@@ -0,0 +1,140 @@
+import json
+import os
+from mesa.visualization.ModularVisualization import CHART_JS_FILE, VisualizationElement
+
+
+def merge_buckets(buckets):
+    # buckets are (first step, min, max, total, count)
+    return (
+        buckets[0][0],
+        min(bucket[1] for bucket in buckets),
+        max(bucket[2] for bucket in buckets),
+        sum(bucket[3] for bucket in buckets),
+        sum(bucket[4] for bucket in buckets),
+    )
+
+
+class SeriesPyramid:
+    # one series at every power of two resolution: level k keeps a bucket
+    # (first step, min, max, total, count) per 2**k values, and only buckets
+    # that are full. appending merges full pairs upwards, so keeping every
+    # level costs about twice the raw series
+
+    def __init__(self):
+        self.levels = [[]]
+
+    def append(self, step, value):
+        bucket = (step, value, value, value, 1)
+        level = 0
+        while True:
+            self.levels[level].append(bucket)
+            if len(self.levels[level]) % 2:
+                return
+            bucket = merge_buckets(self.levels[level][-2:])
+            level += 1
+            if level == len(self.levels):
+                self.levels.append([])
+
+    def get_level(self, max_points):
+        # the finest level that fits in max_points, counting its tail
+        for level, buckets in enumerate(self.levels):
+            if len(buckets) + 1 <= max_points:
+                return level
+        return len(self.levels) - 1
+
+    def get_tail(self, level):
+        # the values after the last full bucket of level, merged, or None.
+        # they are the leftover bucket (if any) of each finer level
+        leftovers = []
+        for finer in range(level):
+            used = 2 * len(self.levels[finer + 1])
+            leftovers.extend(self.levels[finer][used:])
+        if not leftovers:
+            return None
+        leftovers.sort()
+        return merge_buckets(leftovers)
+
+
+class StreamingChartModule(VisualizationElement):
+    # a drop in for mesa's ChartModule for long runs. the stock one has the
+    # browser keep every point of every series, so the page slows down as a
+    # run gets long. this one keeps a SeriesPyramid per series on the server
+    # and only ever shows at most max_points (min, max, mean) buckets: each
+    # render sends the buckets completed since the last one, plus the
+    # unfinished bucket at the end, and when the series outgrows max_points
+    # it switches to the next coarser level and resends it whole.
+    #
+    # there is one stream per server, so a second browser tab only gets
+    # what's sent after it connects (as with ChartModule)
+
+    package_includes = [CHART_JS_FILE]
+    local_includes = ["StreamingChartModule.js"]
+    local_dir = os.path.join(os.path.dirname(__file__), "js")
+
+    def __init__(
+        self,
+        series,
+        canvas_height=200,
+        canvas_width=500,
+        max_points=None,
+        data_collector_name="datacollector",
+    ):
+        self.series = series
+        self.canvas_height = canvas_height
+        self.canvas_width = canvas_width
+        # about one bucket per two pixels by default
+        self.max_points = max_points if max_points is not None else canvas_width // 2
+        self.data_collector_name = data_collector_name
+
+        self.js_code = "elements.push(new StreamingChartModule({}, {}, {}));".format(
+            json.dumps(series), canvas_width, canvas_height
+        )
+        self.model = None
+
+    def reset(self, model):
+        self.model = model
+        self.pyramids = [SeriesPyramid() for _ in self.series]
+        self.consumed = 0
+        self.level = None
+        self.sent = 0
+
+    def add_values(self):
+        model_vars = getattr(self.model, self.data_collector_name).model_vars
+        columns = [model_vars.get(series["Label"], []) for series in self.series]
+        size = min(len(column) for column in columns)
+        for step in range(self.consumed, size):
+            for pyramid, column in zip(self.pyramids, columns):
+                pyramid.append(step, float(column[step]))
+        self.consumed = size
+
+    def get_points(self, buckets):
+        # [step, [mean, ...], [min, ...], [max, ...]] per bucket, series in order
+        return [
+            [
+                row[0][0],
+                [bucket[3] / bucket[4] for bucket in row],
+                [bucket[1] for bucket in row],
+                [bucket[2] for bucket in row],
+            ]
+            for row in zip(*buckets)
+        ]
+
+    def render(self, model):
+        if model is not self.model:
+            self.reset(model)
+        self.add_values()
+
+        level = min(pyramid.get_level(self.max_points) for pyramid in self.pyramids)
+        start = 0 if level != self.level else self.sent
+        points = self.get_points(
+            [pyramid.levels[level][start:] for pyramid in self.pyramids]
+        )
+
+        tails = [pyramid.get_tail(level) for pyramid in self.pyramids]
+        tail = None if tails[0] is None else self.get_points([[bucket] for bucket in tails])[0]
+
+        render = {"reset": level != self.level, "points": points, "tail": tail}
+        self.level = level
+        # series are collected together, so their levels are the same length
+        self.sent = len(self.pyramids[0].levels[level])
+        return render
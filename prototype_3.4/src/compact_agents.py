@@ -0,0 +1,176 @@
+import sys
+import tracemalloc
+from src.agents import Bank, Government, Household, LargeFirm, MediumFirm, SmallFirm
+from src.aggregates import SlottedTrackedTotal
+
+# slotted variants of the agents, picked with MacroModel(agent_layout="slots").
+# every attribute an agent sets has a slot, so the instance dict that
+# mesa.Agent brings is never created. they behave exactly like the classes
+# they extend, and are filed under them in the scheduler's registry
+
+AGENT_SLOTS = ("unique_id", "model", "pos", "group_totals", "group_keys")
+FIRM_SLOTS = AGENT_SLOTS + (
+    "_money",
+    "_goods",
+    "base_goods_cost",
+    "baseline",
+    "customer_goods_requirements",
+    "customers",
+    "employee_counts",
+    "employees",
+    "export_quantity",
+    "goods_demand",
+    "goods_requirement",
+    "government",
+    "households",
+    "month_goods_quantity",
+    "monthly_inflation_rate_sum",
+    "required_employees",
+    "production_fraction",
+    "wage_shares",
+)
+
+
+class CompactAgent:
+    # what every compact class adds to the agent class it extends (the first
+    # class in its MRO that isn't compact): a SlottedTrackedTotal for each of
+    # that class's tracked attributes, group_totals set before the agent's
+    # own __init__ sets any of them (a slot has no class default to fall back
+    # on), and being grouped under the extended class rather than its own
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.base_class = next(
+            agent_class
+            for agent_class in cls.__mro__
+            if not issubclass(agent_class, CompactAgent)
+        )
+        for name in getattr(cls.base_class, "tracked_attributes", ()):
+            tracked_total = SlottedTrackedTotal()
+            tracked_total.__set_name__(cls, name)
+            setattr(cls, name, tracked_total)
+
+    def __init__(self, *args):
+        self.group_totals = None
+        super().__init__(*args)
+
+    def get_group_keys(self):
+        return [
+            self.base_class if key is type(self) else key
+            for key in super().get_group_keys()
+        ]
+
+
+class CompactBank(CompactAgent, Bank):
+    __slots__ = AGENT_SLOTS + ("account", "loans", "deposits", "households")
+
+
+class CompactGovernment(CompactAgent, Government):
+    __slots__ = AGENT_SLOTS + (
+        "account",
+        "total_money_provided",
+        "compounded_inflation_rate",
+        "initial_total_money",
+    )
+
+
+class CompactHousehold(CompactAgent, Household):
+    __slots__ = AGENT_SLOTS + (
+        "_money",
+        "_goods",
+        "education",
+        "index",
+        "strategy",
+        "strategy_start",
+        "strategy_events",
+        "employed",
+        "employer",
+        "goods_requirement",
+        "bank",
+        "government",
+        "stores",
+    )
+
+
+class CompactLargeFirm(CompactAgent, LargeFirm):
+    __slots__ = FIRM_SLOTS
+
+
+class CompactMediumFirm(CompactAgent, MediumFirm):
+    __slots__ = FIRM_SLOTS + ("customer_range",)
+
+
+class CompactSmallFirm(CompactAgent, SmallFirm):
+    __slots__ = FIRM_SLOTS + ("customer_range",)
+
+
+AGENT_LAYOUTS = {
+    "dict": {
+        Bank: Bank,
+        Government: Government,
+        Household: Household,
+        LargeFirm: LargeFirm,
+        MediumFirm: MediumFirm,
+        SmallFirm: SmallFirm,
+    },
+    "slots": {
+        Bank: CompactBank,
+        Government: CompactGovernment,
+        Household: CompactHousehold,
+        LargeFirm: CompactLargeFirm,
+        MediumFirm: CompactMediumFirm,
+        SmallFirm: CompactSmallFirm,
+    },
+}
+
+
+def get_attributes(agent):
+    attributes = dict(getattr(agent, "__dict__", {}))
+    for agent_class in type(agent).__mro__:
+        for name in getattr(agent_class, "__slots__", ()):
+            if hasattr(agent, name):
+                attributes[name] = getattr(agent, name)
+    return attributes
+
+
+def get_bytes_per_agent(agent, copies=1000):
+    # bytes allocated for copies of agent that share all of its attribute
+    # values, so only the instance itself (and its dict, if any) is counted.
+    # what the values cost is the same in both layouts
+    attributes = get_attributes(agent)
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    clones = []
+    for _ in range(copies):
+        clone = object.__new__(type(agent))
+        clone.group_totals = None
+        for name, value in attributes.items():
+            object.__setattr__(clone, name, value)
+        clones.append(clone)
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the clones list itself isn't part of any agent
+    return (end - start - sys.getsizeof(clones)) / copies
+
+
+def get_memory_report(model_class, **model_kwargs):
+    # bytes per agent of every agent class, and of a whole model per
+    # household, in both layouts
+    report = {}
+    for layout in AGENT_LAYOUTS:
+        tracemalloc.start()
+        model = model_class(agent_layout=layout, **model_kwargs)
+        model_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report.setdefault("MacroModel per household", {})[layout] = (
+            model_bytes / model.household_num
+        )
+
+        for base_class in AGENT_LAYOUTS[layout]:
+            agents = model.schedule.agents_by_class.get(base_class)
+            if agents:
+                report.setdefault(base_class.__name__, {})[layout] = (
+                    get_bytes_per_agent(agents[0])
+                )
+    return report
@@ -0,0 +1,151 @@
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Generic, TypeVar
+import copy
+import yaml
+
+T = TypeVar("T")
+
+DEFAULT_CONFIGURATION_PATH = "src/configuration.yaml"
+
+
+@dataclass(frozen=True)
+class FirmSizes(Generic[T]):
+    # one value per firm size, indexed the same way as in configuration.yaml
+    # (ex: config.firm_starting_money["SMALL"])
+    small: T
+    medium: T
+    large: T
+
+    def __getitem__(self, size):
+        return getattr(self, size.lower())
+
+    def values(self):
+        return [self.small, self.medium, self.large]
+
+
+def from_yaml_value(value):
+    if isinstance(value, dict):
+        return FirmSizes(
+            **{size.lower(): from_yaml_value(value) for size, value in value.items()}
+        )
+    if isinstance(value, list):
+        return tuple(from_yaml_value(item) for item in value)
+    return value
+
+
+def to_yaml_value(value):
+    if isinstance(value, FirmSizes):
+        return {
+            "SMALL": to_yaml_value(value.small),
+            "MEDIUM": to_yaml_value(value.medium),
+            "LARGE": to_yaml_value(value.large),
+        }
+    if isinstance(value, tuple):
+        return [to_yaml_value(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class Configuration:
+    # everything in configuration.yaml, one field per key (lowercased). a
+    # model gets one of these and its agents read it through self.model.config,
+    # so differently configured models can live in the same process
+
+    # General
+    education_counts: tuple[int, ...]
+    num_households: int
+    num_firms: FirmSizes[int]
+    total_steps: int
+
+    # Firms
+    total_export_quantity: float
+    export_price: float
+    total_import_quantity: float
+    import_price: float
+    value_added: float
+    goods_interval: int
+    wages_interval: int
+    inflation_interval: int
+    required_employees: FirmSizes[tuple[int, ...]]
+    goods_produced: float
+    firm_starting_money: FirmSizes[float]
+    firm_starting_goods: FirmSizes[float]
+    share_of_production_capacity: tuple[float, ...]
+
+    # Bank
+    loan_ticks: int
+    monthly_interest_rate: float
+    compound_interval: int
+    bank_starting_money: float
+
+    # Household
+    weekly_temporal_discount_rate: float
+    rent_interval: int
+    mortgage_interval: int
+    utilities_interval: int
+    house_cost: float
+    rent_cost: float
+    utilities_cost: float
+    mortgage_cost: float
+    weekly_goods_consumption: float
+    weekly_goods_consumption_range: float
+    monthly_mortgage_rate: float
+    household_starting_money: float
+    household_starting_goods: float
+    household_starting_strategy: str
+
+    # Government
+    government_starting_money: float
+
+    def __post_init__(self):
+        if sum(self.education_counts) != self.num_households:
+            raise Exception(
+                f"EDUCATION_COUNTS adds up to {sum(self.education_counts)} households, not NUM_HOUSEHOLDS ({self.num_households})"
+            )
+
+    @property
+    def total_goods_produced(self):
+        return self.goods_produced + self.total_export_quantity
+
+    @classmethod
+    def from_dict(cls, data):
+        names = [field.name for field in fields(cls)]
+        unknown_keys = set(data) - {name.upper() for name in names}
+        if unknown_keys:
+            raise Exception(f"unknown configuration keys {sorted(unknown_keys)}")
+        missing_keys = {name.upper() for name in names} - set(data)
+        if missing_keys:
+            raise Exception(f"missing configuration keys {sorted(missing_keys)}")
+
+        return cls(**{name: from_yaml_value(data[name.upper()]) for name in names})
+
+    @classmethod
+    def load(cls, path=DEFAULT_CONFIGURATION_PATH):
+        with open(path, "r") as file:
+            return cls.from_dict(yaml.safe_load(file))
+
+    def to_dict(self):
+        return {
+            field.name.upper(): to_yaml_value(getattr(self, field.name))
+            for field in fields(self)
+        }
+
+    def with_overrides(self, overrides):
+        # overrides are keyed like configuration.yaml, with nested keys joined
+        # by "." (ex: {"NUM_FIRMS.SMALL": 8, "EXPORT_PRICE": 20})
+        data = copy.deepcopy(self.to_dict())
+        for key, value in overrides.items():
+            *parents, name = key.split(".")
+            section = data
+            for parent in parents:
+                section = section[parent]
+            if name not in section:
+                raise Exception(f"unknown configuration key {key}")
+            section[name] = value
+        return Configuration.from_dict(data)
+
+
+@lru_cache(maxsize=None)
+def load_default_configuration():
+    return Configuration.load()
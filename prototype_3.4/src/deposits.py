@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class DepositBook:
+    # household deposits as numpy columns (amount, tick deposited, owner's
+    # unique id), one row per household. a deposit compounds every
+    # compound_interval ticks from the tick it was made, so rows are bucketed
+    # by that tick mod the interval: on each tick only one bucket is due, and
+    # it compounds in a single multiply
+
+    def __init__(self, compound_interval, capacity=64):
+        self.compound_interval = compound_interval
+
+        self.amount = np.zeros(capacity)
+        self.start = np.zeros(capacity, dtype=int)
+        self.owner = np.zeros(capacity, dtype=int)
+        self.count = 0
+
+        # row of each unique id's deposit, -1 when it has none
+        self.rows = np.full(capacity, -1)
+        # rows of every phase, as arrays that get joined when the phase is due
+        self.buckets = [[] for _ in range(compound_interval)]
+        # running total of every deposit
+        self.total = 0
+
+    def __len__(self):
+        return self.count
+
+    def grow_rows(self, needed):
+        capacity = len(self.amount)
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - len(self.amount)
+        self.amount = np.concatenate([self.amount, np.zeros(extra)])
+        self.start = np.concatenate([self.start, np.zeros(extra, dtype=int)])
+        self.owner = np.concatenate([self.owner, np.zeros(extra, dtype=int)])
+
+    def grow_ids(self, largest_id):
+        capacity = len(self.rows)
+        while capacity <= largest_id:
+            capacity *= 2
+        self.rows = np.concatenate(
+            [self.rows, np.full(capacity - len(self.rows), -1)]
+        )
+
+    def get_row(self, unique_id):
+        if unique_id >= len(self.rows) or self.rows[unique_id] < 0:
+            return None
+        return self.rows[unique_id]
+
+    def get(self, unique_id):
+        row = self.get_row(unique_id)
+        return None if row is None else self.amount[row]
+
+    def add(self, unique_id, amount, tick):
+        row = self.get_row(unique_id)
+        if row is not None:
+            self.amount[row] += amount
+            self.total += amount
+            return
+        self.add_many(np.array([unique_id]), np.array([amount]), tick)
+
+    def add_many(self, unique_ids, amounts, tick):
+        if len(unique_ids) and unique_ids.max() >= len(self.rows):
+            self.grow_ids(unique_ids.max())
+
+        rows = self.rows[unique_ids]
+        existing = rows >= 0
+        self.amount[rows[existing]] += amounts[existing]
+
+        new_ids = unique_ids[~existing]
+        if len(new_ids):
+            if self.count + len(new_ids) > len(self.amount):
+                self.grow_rows(self.count + len(new_ids))
+            new_rows = np.arange(self.count, self.count + len(new_ids))
+            self.count += len(new_ids)
+
+            self.amount[new_rows] = amounts[~existing]
+            self.start[new_rows] = tick
+            self.owner[new_rows] = new_ids
+            self.rows[new_ids] = new_rows
+            self.buckets[tick % self.compound_interval].append(new_rows)
+
+        self.total += amounts.sum()
+
+    def take(self, unique_id, amount):
+        self.amount[self.rows[unique_id]] -= amount
+        self.total -= amount
+
+    def get_due_rows(self, tick):
+        # deposits made on a tick in phase with this one, so due to compound
+        # (utils.time_due with each deposit's start)
+        bucket = self.buckets[tick % self.compound_interval]
+        if len(bucket) > 1:
+            bucket[:] = [np.concatenate(bucket)]
+        return bucket[0] if bucket else np.zeros(0, dtype=int)
+
+    def add_to_rows(self, rows, amounts):
+        self.amount[rows] += amounts
+        self.total += amounts.sum()
+
+    def sum(self):
+        return self.amount[: self.count].sum()
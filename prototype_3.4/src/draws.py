@@ -0,0 +1,14 @@
+class ModelDraws:
+    # the random draws agents make, taken from the model's generator
+    # (self.rng) for many agents in one call rather than one agent at a time.
+    # a generator gives the same numbers either way, so a seeded model draws
+    # the same economy whichever household engine steps it
+
+    def draw_goods_requirements(self, size):
+        # a week of goods for each of size households
+        config = self.config
+        return self.rng.uniform(
+            config.weekly_goods_consumption - config.weekly_goods_consumption_range,
+            config.weekly_goods_consumption + config.weekly_goods_consumption_range,
+            size,
+        )
@@ -0,0 +1,87 @@
+import multiprocessing
+import numpy as np
+import pandas as pd
+from src.configuration import load_default_configuration
+from src.sweep import check_household_engine, run_scenario_star
+
+QUANTILES = [0.05, 0.5, 0.95]
+
+
+def get_replica_seeds(seed, replicas):
+    # one child of a numpy SeedSequence per replica, so the replicas' streams
+    # are independent of each other and the same for the same seed
+    return [
+        int(child.generate_state(1, np.uint64)[0])
+        for child in np.random.SeedSequence(seed).spawn(replicas)
+    ]
+
+
+def get_bands(model_vars, labels=None, quantiles=QUANTILES):
+    # mean and quantiles of every label over the replicas at each step.
+    # replicas that ended early only count for the steps they reached, the
+    # number that did is in the "runs" column of each label
+    model_vars = [frame for frame in model_vars if not frame.empty]
+    if not model_vars:
+        return pd.DataFrame()
+    stacked = pd.concat(model_vars, keys=range(len(model_vars))).astype(float)
+    if labels is not None:
+        stacked = stacked[labels]
+    steps = stacked.groupby(level=1)
+
+    statistics = {"mean": steps.mean()}
+    for quantile in quantiles:
+        statistics[f"q{quantile:g}"] = steps.quantile(quantile)
+    statistics["runs"] = steps.count()
+
+    bands = pd.concat(statistics, axis=1).swaplevel(axis=1)
+    bands.index.name = "step"
+    return bands[list(stacked.columns)]
+
+
+def run_ensemble(
+    replicas,
+    seed=0,
+    config=None,
+    processes=None,
+    household_engine="vector",
+    data_collection="incremental",
+    labels=None,
+    quantiles=QUANTILES,
+):
+    # runs replicas copies of the model, each with its own seed (see
+    # get_replica_seeds), across a process pool. returns the bands and one
+    # row per replica with its seed, steps reached and error
+    check_household_engine(household_engine)
+    config = config if config is not None else load_default_configuration()
+    seeds = get_replica_seeds(seed, replicas)
+
+    arguments = [
+        (
+            {"run_id": replica, "scenario": 0, "overrides": {}, "seed": replica_seed},
+            config,
+            household_engine,
+            data_collection,
+            labels,
+        )
+        for replica, replica_seed in enumerate(seeds)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        # in replica order, so the bands don't depend on which finishes first
+        results = pool.map(run_scenario_star, arguments)
+
+    runs = pd.DataFrame(
+        [
+            {
+                "replica": result["run_id"],
+                "seed": result["seed"],
+                "steps": result["steps"],
+                "error": result["error"],
+                "seconds": result["seconds"],
+            }
+            for result in results
+        ]
+    ).set_index("replica")
+    bands = get_bands(
+        [result["model_vars"] for result in results], labels=labels, quantiles=quantiles
+    )
+    return bands, runs
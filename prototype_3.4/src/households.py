@@ -0,0 +1,238 @@
+import numpy as np
+from src.agents import BaseAgent, Bank, Government, Household
+from src.ledger import TransferBatch
+from src.utils import get
+
+# household strategies are stored as integer codes (the index in this list)
+STRATEGIES = ["god", "own house", "rent", "mortgage A", "mortgage B", "mortgage C"]
+GOD, OWN_HOUSE, RENT, MORTGAGE_A, MORTGAGE_B, MORTGAGE_C = range(len(STRATEGIES))
+
+# months until a mortgage is paid off, indexed by strategy code
+MORTGAGE_MONTHS = np.array([0, 0, 0, 3, 6, 9])
+
+
+def time_due(time, start, interval):
+    # utils.time_due for an array of start times
+    return (time >= start) & ((time - start) % interval == 0)
+
+
+class HouseholdPopulation(BaseAgent):
+    # all of the model's households as numpy columns, stepped as a single agent
+    # in the place the Household agents would have been scheduled. household i
+    # keeps the unique id it would have had as an agent (unique_id + i), so
+    # bank deposits are keyed the same way as in the object engine. their
+    # money is a block of accounts in the model's ledger, and money moves in
+    # and out of it in batches
+
+    def __init__(self, unique_id, model, educations):
+        super().__init__(unique_id, model)
+        config = model.config
+        self.size = len(educations)
+        self.unique_ids = np.arange(unique_id, unique_id + self.size)
+
+        self.education = np.array(educations)
+
+        self.accounts = model.ledger.open_accounts(
+            self.size, config.household_starting_money
+        )
+        self.first_account = int(self.accounts[0])
+        self.goods = np.full(self.size, config.household_starting_goods, dtype=float)
+        self.goods_requirement = np.zeros(self.size)
+
+        self.strategy = np.full(
+            self.size, STRATEGIES.index(config.household_starting_strategy)
+        )
+        self.strategy_start = np.zeros(self.size, dtype=int)
+        self.employed = np.zeros(self.size, dtype=bool)
+        # unique id of each household's employer, -1 when unemployed
+        self.employer = np.full(self.size, -1)
+        for education in range(3):
+            model.labor_market.add_many(
+                np.flatnonzero(self.education == education).tolist(), education
+            )
+
+    @property
+    def money(self):
+        # a view of the households' balances, in household order
+        first = self.first_account
+        return self.model.ledger.balance[first : first + self.size]
+
+    def get_accounts(self, block=slice(None)):
+        # the accounts of the households in block, as a slice of the ledger
+        # when block is a slice (the accounts are numbered in order). slices
+        # are either all households or a small firm's customers, start:stop,
+        # anything else is an array or list of household indices
+        if isinstance(block, slice):
+            first = self.first_account
+            if block.start is None:
+                return slice(first, first + self.size)
+            return slice(first + block.start, first + block.stop)
+        return self.first_account + np.asarray(block)
+
+    def get_references(self):
+        self.bank = get(self.model, Bank)
+        self.government = get(self.model, Government)
+        self.after_references()
+
+    def after_references(self):
+        self.set_goods_requirement()
+        self.buy_imported_goods()
+
+    def set_goods_requirement(self):
+        self.goods_requirement = self.model.draw_goods_requirements(self.size)
+
+    def buy_imported_goods(self):
+        config = self.model.config
+        quantity = config.total_import_quantity / config.num_households
+
+        self.goods_requirement -= quantity
+        amount = config.import_price * quantity * self.government.compounded_inflation_rate
+
+        self.model.ledger.debit_many(self.get_accounts(), amount)
+        self.model.total_money -= amount * self.size
+
+    def get_goods_requirement(self, block=slice(None)):
+        return np.maximum(self.goods_requirement[block] - self.goods[block], 0)
+
+    def buy_goods(self, firm, block, quantities):
+        # vectorized Firm.sell_goods for a small firm selling quantities to the
+        # households in block
+        ledger = self.model.ledger
+        accounts = self.get_accounts(block)
+        self.government.provide_money_to_population(
+            accounts,
+            firm.goods_cost,
+            self.model.config.weekly_temporal_discount_rate,
+            quantities,
+        )
+
+        prices = firm.goods_cost * firm.fraction_production() * quantities
+
+        bankrupt = ledger.balance[accounts] < prices
+        if bankrupt.any():
+            raise Exception(
+                f"customer household {self.unique_ids[block][bankrupt][0]} went bankrupt"
+            )
+        ledger.debit_many(accounts, prices)
+        firm.money += prices.sum()
+
+        if (firm.goods < np.cumsum(quantities)).any():
+            raise Exception(f"supplier {firm} doesnt have enough goods to provide")
+
+        total_quantity = quantities.sum()
+        self.goods[block] += quantities
+        firm.goods -= total_quantity
+
+        return total_quantity
+
+    def get_group_totals(self):
+        # the same groups Household agents are counted in by GroupTotals
+        counts = np.bincount(self.education, minlength=3)
+        money = np.bincount(self.education, weights=self.money, minlength=3)
+        goods = np.bincount(self.education, weights=self.goods, minlength=3)
+
+        group_totals = {
+            Household: (self.size, {"money": money.sum(), "goods": goods.sum()})
+        }
+        for level in range(3):
+            group_totals[(Household, level)] = (
+                counts[level],
+                {"money": money[level], "goods": goods[level]},
+            )
+        return group_totals
+
+    def employ(self, worker, firm):
+        self.employed[worker] = True
+        self.employer[worker] = firm.unique_id
+
+    def unemploy(self, worker):
+        self.employed[worker] = False
+        self.employer[worker] = -1
+
+    def pay_wages(self, firm, workers, wage):
+        self.model.ledger.credit_many(self.get_accounts(workers), wage)
+        firm.money -= wage * len(workers)
+
+    def pay_rent(self, paying, transfers):
+        config = self.model.config
+        payers = self.accounts[paying]
+        transfers.add(
+            payers, self.bank.account, config.rent_cost - config.utilities_cost
+        )
+        # bank should pay 20% of the rent to the government
+        transfers.add(payers, self.government.account, config.utilities_cost)
+
+    def pay_utilities(self, paying, transfers):
+        transfers.add(
+            self.accounts[paying],
+            self.government.account,
+            self.model.config.utilities_cost,
+        )
+
+    def pay_mortgage(self, paying, transfers):
+        config = self.model.config
+        payers = self.accounts[paying]
+        mortgage_after_interest = config.mortgage_cost * (
+            1 + config.monthly_mortgage_rate
+        ) ** ((self.model.schedule.time - self.strategy_start[paying]) / 4)
+        transfers.add(
+            payers, self.bank.account, mortgage_after_interest - config.utilities_cost
+        )
+        transfers.add(payers, self.government.account, config.utilities_cost)
+
+    def deposit_savings(self):
+        thresholds = np.select(
+            [self.strategy == RENT, self.strategy != GOD], [15, 40], np.inf
+        )
+        depositing = np.flatnonzero(self.money > thresholds)
+        if len(depositing) == 0:
+            return
+
+        amounts = self.money[depositing] - thresholds[depositing]
+        self.bank.deposits.add_many(
+            self.unique_ids[depositing], amounts, self.model.schedule.time
+        )
+        self.model.ledger.debit_many(self.accounts[depositing], amounts)
+
+    def step(self):
+        config = self.model.config
+        time = self.model.schedule.time
+        mortgage = self.strategy >= MORTGAGE_A
+
+        # decide who pays before anyone's strategy changes this tick
+        paying_rent = (self.strategy == RENT) & time_due(
+            time, self.strategy_start, config.rent_interval
+        )
+        paying_mortgage = mortgage & time_due(
+            time, self.strategy_start, config.mortgage_interval
+        )
+        paying_utilities = (self.strategy == OWN_HOUSE) & time_due(
+            time, self.strategy_start, config.utilities_interval
+        )
+
+        # every payment of the tick in one batch of transfers
+        transfers = TransferBatch(self.model.ledger)
+        if paying_rent.any():
+            self.pay_rent(paying_rent, transfers)
+        if paying_mortgage.any():
+            self.pay_mortgage(paying_mortgage, transfers)
+        if paying_utilities.any():
+            self.pay_utilities(paying_utilities, transfers)
+        transfers.apply()
+
+        paid_off = mortgage & (
+            (time - self.strategy_start) / 4 >= MORTGAGE_MONTHS[self.strategy]
+        )
+        self.strategy[paid_off] = OWN_HOUSE
+        self.strategy_start[paid_off] = time
+
+        self.deposit_savings()
+
+        hungry = self.goods < self.goods_requirement
+        if hungry.any():
+            raise Exception(
+                f"household {self.unique_ids[hungry][0]} does not have enough food to consume"
+            )
+        self.goods -= self.goods_requirement
+        self.set_goods_requirement()
+        self.buy_imported_goods()
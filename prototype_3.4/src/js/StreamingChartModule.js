@@ -0,0 +1,115 @@
+// the browser side of chart_stream.StreamingChartModule. every series is
+// drawn as its mean line over a faint band from its min to its max; the
+// server decides the resolution, this only appends what it is sent and
+// swaps the unfinished last bucket
+const StreamingChartModule = function (series, canvas_width, canvas_height) {
+  const canvas = document.createElement("canvas");
+  Object.assign(canvas, {
+    width: canvas_width,
+    height: canvas_height,
+    style: "border:1px dotted",
+  });
+  const elements = document.getElementById("elements");
+  elements.appendChild(canvas);
+  const context = canvas.getContext("2d");
+
+  const convertColorOpacity = (hex) => {
+    if (hex.indexOf("#") != 0) {
+      return "rgba(0,0,0,0.1)";
+    }
+
+    hex = hex.replace("#", "");
+    const r = parseInt(hex.substring(0, 2), 16);
+    const g = parseInt(hex.substring(2, 4), 16);
+    const b = parseInt(hex.substring(4, 6), 16);
+    return `rgba(${r},${g},${b},0.1)`;
+  };
+
+  // three datasets per series, in order: mean, min, max (filled down to min)
+  const datasets = [];
+  for (const s of series) {
+    datasets.push({
+      label: s.Label,
+      borderColor: s.Color,
+      backgroundColor: convertColorOpacity(s.Color),
+      pointRadius: 0,
+      data: [],
+    });
+    datasets.push({
+      label: `${s.Label} min`,
+      borderWidth: 0,
+      pointRadius: 0,
+      data: [],
+    });
+    datasets.push({
+      label: `${s.Label} max`,
+      borderWidth: 0,
+      pointRadius: 0,
+      backgroundColor: convertColorOpacity(s.Color),
+      fill: "-1",
+      data: [],
+    });
+  }
+
+  const chart = new Chart(context, {
+    type: "line",
+    data: { labels: [], datasets: datasets },
+    options: {
+      responsive: true,
+      animation: false,
+      plugins: {
+        legend: {
+          labels: { filter: (item) => item.datasetIndex % 3 == 0 },
+        },
+      },
+      scales: {
+        x: { display: true, ticks: { maxTicksLimit: 11 } },
+        y: { display: true },
+      },
+    },
+  });
+
+  let hasTail = false;
+
+  const push = (point) => {
+    const [step, means, minimums, maximums] = point;
+    chart.data.labels.push(step);
+    for (let i = 0; i < series.length; i++) {
+      chart.data.datasets[3 * i].data.push(means[i]);
+      chart.data.datasets[3 * i + 1].data.push(minimums[i]);
+      chart.data.datasets[3 * i + 2].data.push(maximums[i]);
+    }
+  };
+
+  const pop = () => {
+    chart.data.labels.pop();
+    chart.data.datasets.forEach((dataset) => dataset.data.pop());
+  };
+
+  const clear = () => {
+    chart.data.labels.length = 0;
+    chart.data.datasets.forEach((dataset) => {
+      dataset.data.length = 0;
+    });
+    hasTail = false;
+  };
+
+  this.render = (data) => {
+    if (data.reset) {
+      clear();
+    } else if (hasTail) {
+      pop();
+    }
+    data.points.forEach(push);
+    hasTail = data.tail !== null;
+    if (hasTail) {
+      push(data.tail);
+    }
+    chart.update();
+  };
+
+  this.reset = () => {
+    clear();
+    chart.update();
+  };
+};
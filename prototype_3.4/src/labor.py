@@ -0,0 +1,29 @@
+from collections import deque
+
+
+class LaborMarket:
+    # unemployed workers of each education level, queued in the order they
+    # became available: Household agents in the object engine, indices into
+    # the HouseholdPopulation columns in the vector engine. hiring takes the
+    # worker at the front of the queue and firing puts one at the back, both
+    # without looking at any other household
+
+    def __init__(self, education_levels=3):
+        self.pools = [deque() for _ in range(education_levels)]
+
+    def add(self, worker, education):
+        self.pools[education].append(worker)
+
+    def add_many(self, workers, education):
+        self.pools[education].extend(workers)
+
+    def hire(self, education):
+        # None when there is nobody of that education left to hire
+        pool = self.pools[education]
+        return pool.popleft() if pool else None
+
+    def release(self, worker, education):
+        self.pools[education].append(worker)
+
+    def unemployed_count(self, education):
+        return len(self.pools[education])
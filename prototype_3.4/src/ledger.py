@@ -0,0 +1,123 @@
+import numpy as np
+
+
+def get_count(accounts):
+    if isinstance(accounts, slice):
+        return accounts.stop - accounts.start
+    return np.size(accounts)
+
+
+class Ledger:
+    # the money of the vector engine's households, the bank and the
+    # government, as one numpy balance array indexed by account. it is only
+    # what the vector engine needs to move its households' money in batches:
+    # payments between accounts (rent, utilities and mortgages to the bank
+    # and government, loans) go through transfer_many, a whole phase in one
+    # vectorized call; money entering or leaving a block of households
+    # (government transfers, imports, deposits, sales and wages) through
+    # credit_many and debit_many.
+    #
+    # firms and the object engine's households are paid and charged one at a
+    # time and their money is in the model's running group totals, so it
+    # stays on the agent (see TrackedTotal). the firm's side of a batched
+    # payment is posted to firm.money once (see HouseholdPopulation.buy_goods)
+
+    def __init__(self, capacity=64):
+        self.balance = np.zeros(capacity)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def grow(self, needed):
+        capacity = len(self.balance)
+        while capacity < needed:
+            capacity *= 2
+        self.balance = np.concatenate(
+            [self.balance, np.zeros(capacity - len(self.balance))]
+        )
+
+    def open_accounts(self, count, balance=0.0):
+        # count new accounts, numbered one after the other
+        if self.size + count > len(self.balance):
+            self.grow(self.size + count)
+        accounts = np.arange(self.size, self.size + count)
+        self.balance[self.size : self.size + count] = balance
+        self.size += count
+        return accounts
+
+    def open_account(self, balance=0.0):
+        return int(self.open_accounts(1, balance)[0])
+
+    def transfer_many(self, sources, destinations, amounts):
+        # sources, destinations and amounts are single values or arrays of the
+        # same length
+        amounts = np.asarray(amounts, dtype=float)
+        if amounts.ndim == 0:
+            amounts = np.full(
+                max(get_count(sources), get_count(destinations)), amounts
+            )
+        self.post(sources, -amounts)
+        self.post(destinations, amounts)
+
+    def post(self, accounts, amounts):
+        # accounts is an account, a slice of them or an array of them. a
+        # single account takes the sum of amounts, otherwise each account
+        # takes its own amount; an account that comes up more than once in an
+        # array is changed once per amount, in order
+        if isinstance(accounts, slice):
+            self.balance[accounts] += amounts
+        elif np.ndim(accounts) == 0:
+            self.balance[accounts] += amounts.sum()
+        else:
+            np.add.at(self.balance, accounts, amounts)
+
+    def credit_many(self, accounts, amounts):
+        # accounts (a slice or an array) must all be different
+        self.balance[accounts] += amounts
+
+    def debit_many(self, accounts, amounts):
+        # accounts (a slice or an array) must all be different
+        self.balance[accounts] -= amounts
+
+
+class AccountBalance:
+    # an agent's money, kept in its model's ledger under agent.account
+    # (opened by the agent before its money is first set)
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        return agent.model.ledger.balance.item(agent.account)
+
+    def __set__(self, agent, value):
+        agent.model.ledger.balance[agent.account] = value
+
+
+class TransferBatch:
+    # transfers gathered over a phase, then made in a single transfer_many
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.sources = []
+        self.destinations = []
+        self.amounts = []
+
+    def add(self, sources, destinations, amounts):
+        sources, destinations, amounts = np.broadcast_arrays(
+            sources, destinations, amounts
+        )
+        self.sources.append(sources.ravel())
+        self.destinations.append(destinations.ravel())
+        self.amounts.append(amounts.ravel())
+
+    def apply(self):
+        if not self.sources:
+            return
+        self.ledger.transfer_many(
+            np.concatenate(self.sources),
+            np.concatenate(self.destinations),
+            np.concatenate(self.amounts),
+        )
+        self.sources = []
+        self.destinations = []
+        self.amounts = []
@@ -0,0 +1,106 @@
+import heapq
+import numpy as np
+
+
+class LoanBook:
+    # the bank's outstanding loans as numpy columns (amount owed, tick the loan
+    # was made, index of the household that owes it), one row per loan. a heap
+    # of maturity ticks means only loans that are due get looked at, and a
+    # count of loans per compounding phase lets most ticks skip compounding
+
+    def __init__(self, loan_ticks, compound_interval, interest_rate, capacity=64):
+        self.loan_ticks = loan_ticks
+        self.compound_interval = compound_interval
+        self.interest_rate = interest_rate
+
+        self.amount = np.zeros(capacity)
+        self.start = np.zeros(capacity, dtype=int)
+        self.household = np.zeros(capacity, dtype=int)
+        self.active = np.zeros(capacity, dtype=bool)
+
+        self.free_rows = list(range(capacity - 1, -1, -1))
+        # (tick due, loan number, row), loan number keeps loans due on the
+        # same tick in the order they were made
+        self.maturities = []
+        self.loan_count = 0
+        self.phase_counts = [0] * compound_interval
+
+    def __len__(self):
+        return len(self.maturities)
+
+    def grow(self):
+        capacity = len(self.amount)
+        self.amount = np.concatenate([self.amount, np.zeros(capacity)])
+        self.start = np.concatenate([self.start, np.zeros(capacity, dtype=int)])
+        self.household = np.concatenate(
+            [self.household, np.zeros(capacity, dtype=int)]
+        )
+        self.active = np.concatenate([self.active, np.zeros(capacity, dtype=bool)])
+        self.free_rows.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def add(self, household_index, amount, tick):
+        if not self.free_rows:
+            self.grow()
+        row = self.free_rows.pop()
+
+        self.amount[row] = amount
+        self.start[row] = tick
+        self.household[row] = household_index
+        self.active[row] = True
+
+        # demanded once it has been out for more than loan_ticks
+        heapq.heappush(
+            self.maturities, (tick + self.loan_ticks + 1, self.loan_count, row)
+        )
+        self.loan_count += 1
+        self.phase_counts[tick % self.compound_interval] += 1
+        return row
+
+    def add_many(self, household_indices, amounts, tick):
+        # one loan per household index, all made at tick
+        count = len(household_indices)
+        while len(self.free_rows) < count:
+            self.grow()
+        rows = self.free_rows[::-1][:count]
+        del self.free_rows[len(self.free_rows) - count :]
+
+        self.amount[rows] = amounts
+        self.start[rows] = tick
+        self.household[rows] = household_indices
+        self.active[rows] = True
+
+        for row in rows:
+            heapq.heappush(
+                self.maturities, (tick + self.loan_ticks + 1, self.loan_count, row)
+            )
+            self.loan_count += 1
+        self.phase_counts[tick % self.compound_interval] += count
+        return rows
+
+    def remove(self, row):
+        self.active[row] = False
+        self.phase_counts[self.start[row] % self.compound_interval] -= 1
+        self.free_rows.append(row)
+
+    def compound(self, tick):
+        # every loan that has been out for a whole number of compound
+        # intervals grows by the interest rate, in one multiply
+        phase = tick % self.compound_interval
+        if self.phase_counts[phase] == 0:
+            return
+        due = (
+            self.active
+            & (self.start < tick)
+            & (self.start % self.compound_interval == phase)
+        )
+        self.amount[due] *= 1 + self.interest_rate
+
+    def pop_due(self, tick):
+        # rows of the loans due at tick, in the order they were made
+        due_rows = []
+        while self.maturities and self.maturities[0][0] <= tick:
+            due_rows.append(heapq.heappop(self.maturities)[2])
+        return due_rows
+
+    def total(self):
+        return self.amount[self.active].sum()
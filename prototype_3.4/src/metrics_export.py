@@ -0,0 +1,81 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+
+
+class ChunkedMetricsWriter:
+    # moves the model level metrics out of the datacollector into numpy .npz
+    # files of chunk_ticks rows each (one array per reporter label, plus
+    # "step"), so a long run only ever holds one chunk in memory. after the
+    # run, the datacollector's dataframe only has what wasn't flushed yet, read
+    # everything back with ChunkedMetricsReader
+    def __init__(self, directory, chunk_ticks=100):
+        self.directory = directory
+        self.chunk_ticks = chunk_ticks
+        self.chunk_count = 0
+        self.rows_written = 0
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "chunk_*.npz")):
+            os.remove(path)
+
+    def collect(self, datacollector):
+        # called after every datacollector.collect
+        if self.get_row_count(datacollector) >= self.chunk_ticks:
+            self.flush(datacollector)
+
+    @staticmethod
+    def get_row_count(datacollector):
+        return len(next(iter(datacollector.model_vars.values()), []))
+
+    def flush(self, datacollector):
+        row_count = self.get_row_count(datacollector)
+        if row_count == 0:
+            return
+
+        columns = {
+            label: np.asarray(values, dtype=float)
+            for label, values in datacollector.model_vars.items()
+        }
+        columns["step"] = np.arange(self.rows_written, self.rows_written + row_count)
+        np.savez(
+            os.path.join(self.directory, f"chunk_{self.chunk_count:06d}.npz"),
+            **columns,
+        )
+
+        self.chunk_count += 1
+        self.rows_written += row_count
+        for values in datacollector.model_vars.values():
+            values.clear()
+
+
+class ChunkedMetricsReader:
+    # reads the chunks of a ChunkedMetricsWriter one at a time, and only the
+    # columns that are asked for
+    def __init__(self, directory):
+        self.paths = sorted(glob.glob(os.path.join(directory, "chunk_*.npz")))
+        if not self.paths:
+            raise Exception(f"no metric chunks in {directory}")
+
+    def get_labels(self):
+        with np.load(self.paths[0]) as chunk:
+            return [label for label in chunk.files if label != "step"]
+
+    def iter_chunks(self, labels=None):
+        for path in self.paths:
+            with np.load(path) as chunk:
+                yield {
+                    label: chunk[label]
+                    for label in (labels if labels is not None else chunk.files)
+                }
+
+    def get_column(self, label):
+        return np.concatenate([chunk[label] for chunk in self.iter_chunks([label])])
+
+    def get_dataframe(self, labels=None):
+        labels = labels if labels is not None else self.get_labels()
+        chunks = list(self.iter_chunks(["step", *labels]))
+        return pd.DataFrame(
+            {label: np.concatenate([chunk[label] for chunk in chunks]) for label in labels},
+            index=np.concatenate([chunk["step"] for chunk in chunks]),
+        )
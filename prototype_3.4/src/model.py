@@ -1,10 +1,22 @@
 import mesa
-from mesa.time import BaseScheduler
 from mesa.datacollection import DataCollector
+from src.scheduler import EventScheduler
 from src.agents import Household, Bank, Government, LargeFirm, MediumFirm, SmallFirm
+from src.households import HouseholdPopulation
+from src.aggregates import GroupTotals, IncrementalDataCollector
+from src.compact_agents import AGENT_LAYOUTS
+from src.draws import ModelDraws
+from src.labor import LaborMarket
+from src.ledger import Ledger
+from src.model_log import ModelLog
+from src.sharding import ShardedEconomy
+from src.snapshot import load_snapshot, save_snapshot
+from src.configuration import load_default_configuration
 from src.utils import get, get_all, avg, split_agents
+from functools import partial
 import itertools
-import yaml
+import os
+import numpy as np
 
 
 def get_bank_money(model):
@@ -39,16 +51,36 @@ def get_avg_small_firm_goods(model):
     return avg([firm.goods for firm in get_all(model, SmallFirm)])
 
 
+def get_education_avg(model, attribute, level):
+    population = model.household_population
+    if population is not None:
+        return getattr(population, attribute)[population.education == level].mean()
+    return avg(
+        [
+            getattr(agent, attribute)
+            for agent in get_all(model, Household)
+            if agent.education == level
+        ]
+    )
+
+
 def get_total_household_money(model):
+    if model.household_population is not None:
+        return model.household_population.money.sum()
     return sum(household.money for household in get_all(model, Household))
 
 
 def get_avg_household_money(model):
-    return avg({household.money for household in get_all(model, Household)})
+    # the mean over every household. it used to be over the set of distinct
+    # balances, which counted households with the same money once and can't
+    # be kept as a running total
+    if model.household_population is not None:
+        return model.household_population.money.mean()
+    return avg([household.money for household in get_all(model, Household)])
 
 
 def get_household_deposits(model):
-    return sum(info["amount"] for info in get(model, Bank).deposits.values())
+    return get(model, Bank).deposits.sum()
 
 
 def get_inflation_rate(model):
@@ -59,117 +91,365 @@ def get_compounded_inflation_rate(model):
     return get(model, Government).compounded_inflation_rate
 
 
-# load configuration file's variables
-with open("src/configuration.yaml", "r") as file:
-    data = yaml.safe_load(file)
+def get_incremental_total_household_money(model):
+    return model.group_totals.get_total(Household, "money")
+
+
+def get_incremental_household_deposits(model):
+    return get(model, Bank).deposits.total
+
+
+def get_group_avg(model, group, attribute):
+    return model.group_totals.get_avg(group, attribute)
+
+
+def group_avg_reporter(group, attribute):
+    # partials rather than lambdas, so the datacollector can be pickled into a
+    # snapshot
+    return partial(get_group_avg, group=group, attribute=attribute)
+
 
+def get_reporters(educations):
+    data_collectors = {}
 
-class MacroModel(mesa.Model):
-    household_num = data["NUM_HOUSEHOLDS"]
+    for level in educations:
+        data_collectors[f"Education {level + 1} Avg Money"] = partial(
+            get_education_avg, attribute="money", level=level
+        )
+        data_collectors[f"Education {level + 1} Avg Goods"] = partial(
+            get_education_avg, attribute="goods", level=level
+        )
+
+    data_collectors.update(
+        {
+            "Bank Money": get_bank_money,
+            "Large Firm Avg Money": get_avg_large_firm_money,
+            "Medium Firm Avg Money": get_avg_medium_firm_money,
+            "Small Firm Avg Money": get_avg_small_firm_money,
+            "Large Firm Avg Goods": get_avg_large_firm_goods,
+            "Medium Firm Avg Goods": get_avg_medium_firm_goods,
+            "Small Firm Avg Goods": get_avg_small_firm_goods,
+            "Government Money": get_government_money,
+            "Total Household Money": get_total_household_money,
+            "Avg Household Money": get_avg_household_money,
+            "Total Household Deposits": get_household_deposits,
+            "Inflation Rate": get_inflation_rate,
+            "Compounded Inflation Rate": get_compounded_inflation_rate,
+        }
+    )
+
+    return data_collectors
+
+
+def get_incremental_reporters(educations):
+    # the same labels as get_reporters, read from the model's running group
+    # totals instead of scanning the agents
+    reporters = {}
+
+    for level in educations:
+        reporters[f"Education {level + 1} Avg Money"] = group_avg_reporter(
+            (Household, level), "money"
+        )
+        reporters[f"Education {level + 1} Avg Goods"] = group_avg_reporter(
+            (Household, level), "goods"
+        )
 
-    # education 2 is the highest, 1 is mid, 0 is bad
-    educations = (
-        [0] * data["EDUCATION_COUNTS"][0]
-        + [1] * data["EDUCATION_COUNTS"][1]
-        + [2] * data["EDUCATION_COUNTS"][2]
+    reporters.update(
+        {
+            "Bank Money": get_bank_money,
+            "Large Firm Avg Money": group_avg_reporter(LargeFirm, "money"),
+            "Medium Firm Avg Money": group_avg_reporter(MediumFirm, "money"),
+            "Small Firm Avg Money": group_avg_reporter(SmallFirm, "money"),
+            "Large Firm Avg Goods": group_avg_reporter(LargeFirm, "goods"),
+            "Medium Firm Avg Goods": group_avg_reporter(MediumFirm, "goods"),
+            "Small Firm Avg Goods": group_avg_reporter(SmallFirm, "goods"),
+            "Government Money": get_government_money,
+            "Total Household Money": get_incremental_total_household_money,
+            "Avg Household Money": group_avg_reporter(Household, "money"),
+            "Total Household Deposits": get_incremental_household_deposits,
+            "Inflation Rate": get_inflation_rate,
+            "Compounded Inflation Rate": get_compounded_inflation_rate,
+        }
     )
 
-    def __init__(self, total_steps=data["TOTAL_STEPS"]):
+    return reporters
+
+
+def get_household_labels(educations):
+    # the labels whose reporters read the households' money and goods
+    labels = []
+    for level in educations:
+        labels.append(f"Education {level + 1} Avg Money")
+        labels.append(f"Education {level + 1} Avg Goods")
+    return labels + ["Total Household Money", "Avg Household Money"]
+
+
+def select_reporters(reporters, labels):
+    # only the reporters of the labels something reads (charts, an output
+    # file, ...), so the others are never computed. None keeps all of them
+    if labels is None:
+        return reporters
+    unknown = [label for label in labels if label not in reporters]
+    if unknown:
+        raise Exception(f"unknown metrics {unknown}")
+    return {label: reporters[label] for label in labels}
+
+
+class MacroModel(ModelDraws, mesa.Model):
+    # "object" steps every household as its own Household agent, "vector"
+    # steps all of them at once as numpy columns in a HouseholdPopulation,
+    # "sharded" runs the small firms and households in worker processes (see
+    # sharding.py)
+    household_engines = ["object", "vector", "sharded"]
+
+    # "scan" reporters go over the agents on every collect, "incremental" ones
+    # read running per-group totals that agents update as their money and
+    # goods change
+    data_collection_modes = ["scan", "incremental"]
+
+    def __init__(
+        self,
+        total_steps=None,
+        household_engine="object",
+        data_collection="scan",
+        config=None,
+        log=None,
+        metrics_writer=None,
+        profiler=None,
+        agent_layout="dict",
+        shards=None,
+        seed=None,
+        labels=None,
+    ):
+        # mesa seeds self.random from seed (it has to be passed by keyword),
+        # or from the global random when it is None
         super().__init__()
+        # every draw the model makes comes from this generator, in bulk (see
+        # draws.py), so a seed gives the same run in any process
+        self.rng = np.random.default_rng(self.random.getrandbits(64))
+        # this tick's goods requirement of every Household agent, see
+        # draw_households
+        self.goods_requirement_draws = None
+
+        # src/configuration.yaml unless a Configuration is passed in
+        self.config = config if config is not None else load_default_configuration()
+        config = self.config
+        # quiet unless a ModelLog is passed in (see model_log.py)
+        self.log = log if log is not None else ModelLog()
+
+        self.household_num = config.num_households
+        # education 2 is the highest, 1 is mid, 0 is bad
+        self.educations = (
+            [0] * config.education_counts[0]
+            + [1] * config.education_counts[1]
+            + [2] * config.education_counts[2]
+        )
 
-        self.total_money = data["HOUSEHOLD_STARTING_MONEY"] * data[
-            "NUM_HOUSEHOLDS"
-        ] + sum(
+        if household_engine not in self.household_engines:
+            raise Exception(f"unknown household engine {household_engine}")
+        if data_collection not in self.data_collection_modes:
+            raise Exception(f"unknown data collection mode {data_collection}")
+        self.household_engine = household_engine
+        if household_engine == "sharded" and data_collection != "incremental":
+            # the households are in other processes, only their totals come back
+            raise Exception(
+                "the sharded household engine needs incremental data collection"
+            )
+        if agent_layout not in AGENT_LAYOUTS:
+            raise Exception(f"unknown agent layout {agent_layout}")
+        # "slots" builds the compact agent classes of compact_agents.py
+        agent_classes = AGENT_LAYOUTS[agent_layout]
+        self.household_population = None
+        # the money of the bank, government and vector engine households, see
+        # ledger.py
+        self.ledger = Ledger()
+        self.group_totals = GroupTotals() if data_collection == "incremental" else None
+
+        self.total_money = config.household_starting_money * config.num_households + sum(
             [
                 num_firms * firm_money
                 for (num_firms, firm_money) in zip(
-                    data["NUM_FIRMS"].values(), data["FIRM_STARTING_MONEY"].values()
+                    config.num_firms.values(), config.firm_starting_money.values()
                 )
             ]
         )
 
-        self.total_steps = total_steps
-        self.schedule = BaseScheduler(self)
+        self.total_steps = total_steps if total_steps is not None else config.total_steps
+        self.schedule = EventScheduler(self)
+        # unemployed households of each education, for firms to hire from
+        self.labor_market = LaborMarket()
 
         id_giver = itertools.count(1)
-        self.schedule.add(Government(next(id_giver), self))
-        self.schedule.add(Bank(next(id_giver), self))
-        for _ in range(data["NUM_FIRMS"]["LARGE"]):
-            self.schedule.add(LargeFirm(next(id_giver), self))
+        self.schedule.add(agent_classes[Government](next(id_giver), self))
+        self.schedule.add(agent_classes[Bank](next(id_giver), self))
+        for _ in range(config.num_firms.large):
+            self.schedule.add(agent_classes[LargeFirm](next(id_giver), self))
 
         self.small_firm_ranges = split_agents(
-            data["NUM_FIRMS"]["SMALL"], data["NUM_FIRMS"]["MEDIUM"]
+            config.num_firms.small, config.num_firms.medium
         )
 
-        for i in range(data["NUM_FIRMS"]["MEDIUM"]):
+        for i in range(config.num_firms.medium):
             self.schedule.add(
-                MediumFirm(next(id_giver), self, self.small_firm_ranges[i])
+                agent_classes[MediumFirm](
+                    next(id_giver), self, self.small_firm_ranges[i]
+                )
             )
 
         self.household_ranges = split_agents(
-            data["NUM_HOUSEHOLDS"], data["NUM_FIRMS"]["SMALL"]
+            config.num_households, config.num_firms.small
         )
 
-        for i in range(data["NUM_FIRMS"]["SMALL"]):
-            self.schedule.add(SmallFirm(next(id_giver), self, self.household_ranges[i]))
+        small_firms = []
+        for i in range(config.num_firms.small):
+            small_firm = agent_classes[SmallFirm](
+                next(id_giver), self, self.household_ranges[i]
+            )
+            small_firms.append(small_firm)
+            if household_engine == "sharded":
+                # stepped by the shards, this copy is only kept in sync
+                self.schedule.register(small_firm)
+            else:
+                self.schedule.add(small_firm)
+
+        if household_engine == "sharded":
+            self.household_population = ShardedEconomy(
+                next(id_giver),
+                self,
+                self.educations,
+                small_firms,
+                shards if shards is not None else os.cpu_count(),
+            )
+            self.schedule.add(self.household_population)
+        elif household_engine == "vector":
+            self.household_population = HouseholdPopulation(
+                next(id_giver), self, self.educations
+            )
+            self.schedule.add(self.household_population)
+        else:
+            for i in range(self.household_num):
+                self.schedule.add(
+                    agent_classes[Household](
+                        next(id_giver), self, self.educations[i], i
+                    )
+                )
 
-        for i in range(self.household_num):
-            self.schedule.add(Household(next(id_giver), self, self.educations[i]))
+        try:
+            self.finish_setup(data_collection, labels, metrics_writer, profiler)
+        except BaseException:
+            # a sharded economy's workers have been started by now
+            self.close()
+            raise
 
+    def finish_setup(self, data_collection, labels, metrics_writer, profiler):
+        self.draw_households()
         for agent in self.schedule.agents:
             agent.get_references()
 
         unique_educations = list(set(self.educations))
 
-        data_collectors = {}
-
-        for level in unique_educations:
-            data_collectors[f"Education {level + 1} Avg Money"] = (
-                lambda model, level=level: avg(
-                    [
-                        agent.money
-                        for agent in model.schedule.agents
-                        if isinstance(agent, Household) and agent.education == level
-                    ]
-                )
+        # every metric unless told which labels are read
+        if data_collection == "incremental":
+            reporters = select_reporters(
+                get_incremental_reporters(unique_educations), labels
             )
-            data_collectors[f"Education {level + 1} Avg Goods"] = (
-                lambda model, level=level: avg(
-                    [
-                        agent.goods
-                        for agent in model.schedule.agents
-                        if isinstance(agent, Household) and agent.education == level
-                    ]
-                )
+            self.datacollector = IncrementalDataCollector(
+                reporters,
+                read_households=any(
+                    label in reporters for label in get_household_labels(unique_educations)
+                ),
+            )
+        else:
+            self.datacollector = DataCollector(
+                select_reporters(get_reporters(unique_educations), labels)
+            )
+        # streams collected metrics to disk when a ChunkedMetricsWriter is
+        # passed in (see metrics_export.py)
+        self.metrics_writer = metrics_writer
+        self.collect()
+
+        # times agent steps and methods when a StepProfiler is passed in (see
+        # profiling.py)
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self)
+
+    def aggregate_demand(self):
+        # work out every firm's goods requirement once per tick, bottom-up
+        # (households -> small -> medium -> large), before any agent steps.
+        # sharded small firms have already sent theirs
+        firm_classes = [SmallFirm, MediumFirm, LargeFirm]
+        if self.household_engine == "sharded":
+            firm_classes = [MediumFirm, LargeFirm]
+        for firm_class in firm_classes:
+            for firm in get_all(self, firm_class):
+                firm.aggregate_demand()
+
+    def draw_households(self):
+        # what the object engine's households draw this tick, in one call.
+        # they take theirs by index in the order they step, so these are the
+        # numbers they would have drawn one at a time
+        if self.household_engine == "object":
+            self.goods_requirement_draws = self.draw_goods_requirements(
+                self.household_num
             )
-
-        data_collectors.update(
-            {
-                "Bank Money": get_bank_money,
-                "Large Firm Avg Money": get_avg_large_firm_money,
-                "Medium Firm Avg Money": get_avg_medium_firm_money,
-                "Small Firm Avg Money": get_avg_small_firm_money,
-                "Large Firm Avg Goods": get_avg_large_firm_goods,
-                "Medium Firm Avg Goods": get_avg_medium_firm_goods,
-                "Small Firm Avg Goods": get_avg_small_firm_goods,
-                "Government Money": get_government_money,
-                "Total Household Money": get_total_household_money,
-                "Avg Household Money": get_avg_household_money,
-                "Total Household Deposits": get_household_deposits,
-                "Inflation Rate": get_inflation_rate,
-                "Compounded Inflation Rate": get_compounded_inflation_rate,
-            }
-        )
-
-        self.datacollector = DataCollector(data_collectors)
-        self.datacollector.collect(self)
 
     def step(self):
+        # model level events (ex: policy shocks) come before anything else
+        self.schedule.run_due_events()
+        self.aggregate_demand()
+        self.draw_households()
         # tell all the agents in the model to run their step function
         self.schedule.step()
         # collect data
-        self.datacollector.collect(self)
+        self.collect()
+        if self.profiler is not None:
+            self.profiler.end_tick(self.schedule.time - 1)
 
-    def run_model(self):
-        for _ in range(self.total_steps):
-            self.step()
+    def collect(self):
+        self.datacollector.collect(self)
+        if self.metrics_writer is not None:
+            self.metrics_writer.collect(self.datacollector)
+
+    def run_model(self, snapshot_path=None, snapshot_interval=None):
+        # runs up to total_steps, so a model restored from a snapshot carries
+        # on where it was saved. with snapshot_path and snapshot_interval the
+        # model saves itself every snapshot_interval steps
+        try:
+            for _ in range(self.schedule.steps, self.total_steps):
+                self.step()
+                if snapshot_interval and self.schedule.steps % snapshot_interval == 0:
+                    self.save_snapshot(snapshot_path)
+        finally:
+            self.log.flush()
+            self.close()
+            if self.metrics_writer is not None:
+                self.metrics_writer.flush(self.datacollector)
+
+    def save_snapshot(self, path):
+        if self.household_engine == "sharded":
+            raise Exception("sharded models can't be snapshotted")
+        save_snapshot(self, path)
+
+    def close(self):
+        # stops the worker processes of a sharded model. run_model closes the
+        # model when it ends; a model stepped some other way is closed by a
+        # with block (with MacroModel(...) as model:), or when it is garbage
+        # collected
+        if getattr(self, "household_engine", None) == "sharded" and (
+            self.household_population is not None
+        ):
+            self.household_population.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    @staticmethod
+    def load_snapshot(path):
+        return load_snapshot(path)
@@ -0,0 +1,80 @@
+from collections import deque
+import json
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+
+class RingSink:
+    # keeps the last capacity records in memory, as dicts
+    def __init__(self, capacity=1000):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+
+class JsonlSink:
+    # one json object per line, written buffer_size records at a time
+    def __init__(self, path, buffer_size=1000):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        # start from an empty file, later flushes append to it
+        open(path, "w").close()
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with open(self.path, "a") as file:
+            for record in self.buffer:
+                file.write(json.dumps(record, default=float) + "\n")
+        self.buffer = []
+
+
+class PrintSink:
+    # the old print output, for watching a single model run
+    def write(self, record):
+        fields = " ".join(
+            f"{key}: {value}"
+            for key, value in record.items()
+            if key not in ("tick", "level", "event")
+        )
+        print(f"[{record['tick']}] {record['level']} {record['event']} {fields}")
+
+    def flush(self):
+        pass
+
+
+class ModelLog:
+    # structured diagnostics of a model (loan defaults, wages, inflation, ...).
+    # call sites check enabled(level) before building a record, so anything
+    # below the level costs one comparison. records are dicts and only get
+    # formatted by the sinks. the default is quiet: warnings and errors go to
+    # an in-memory ring and nothing is printed
+    def __init__(self, level=WARNING, sinks=None):
+        self.level = level
+        self.sinks = sinks if sinks is not None else [RingSink()]
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def emit(self, level, event, tick, **fields):
+        record = {"tick": tick, "level": LEVEL_NAMES[level], "event": event, **fields}
+        for sink in self.sinks:
+            sink.write(record)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
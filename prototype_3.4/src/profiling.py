@@ -0,0 +1,93 @@
+import json
+import time
+import pandas as pd
+
+# methods timed on every agent that has them, "step" gives the time of each
+# agent class
+PROFILED_METHODS = [
+    "step",
+    "sell_goods",
+    "pay_wages",
+    "export",
+    "acquire_goods",
+    "buy_imported_goods",
+]
+# MacroModel methods timed for the model as a whole
+PROFILED_MODEL_METHODS = ["aggregate_demand", "collect"]
+
+
+class TimedMethod:
+    # stands in for a bound method on a single object, adding its wall time
+    # and a call to the profiler under key. a class rather than a closure so
+    # an instrumented model can still be snapshotted
+    def __init__(self, profiler, key, method):
+        self.profiler = profiler
+        self.key = key
+        self.method = method
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.method(*args, **kwargs)
+        finally:
+            self.profiler.add(self.key, time.perf_counter() - start)
+
+
+class StepProfiler:
+    # opt in wall time and call counts of every agent class's step, the main
+    # agent methods and the model's data collection, kept per tick. times are
+    # inclusive (SmallFirm.step contains SmallFirm.sell_goods). a model without
+    # a profiler has nothing wrapped, so it pays nothing
+    def __init__(self, methods=PROFILED_METHODS, model_methods=PROFILED_MODEL_METHODS):
+        self.methods = methods
+        self.model_methods = model_methods
+        # key -> [seconds, calls] for the tick in progress
+        self.current = {}
+        # (tick, key, seconds, calls)
+        self.records = []
+
+    def instrument(self, model):
+        # replaces the methods on each instance, so events that call them
+        # through self are timed too
+        for agent in model.schedule.agents:
+            for name in self.methods:
+                method = getattr(agent, name, None)
+                if method is not None:
+                    key = f"{type(agent).__name__}.{name}"
+                    setattr(agent, name, TimedMethod(self, key, method))
+        for name in self.model_methods:
+            key = f"{type(model).__name__}.{name}"
+            setattr(model, name, TimedMethod(self, key, getattr(model, name)))
+
+    def add(self, key, seconds):
+        totals = self.current.get(key)
+        if totals is None:
+            self.current[key] = [seconds, 1]
+        else:
+            totals[0] += seconds
+            totals[1] += 1
+
+    def end_tick(self, tick):
+        for key, (seconds, calls) in self.current.items():
+            self.records.append((tick, key, seconds, calls))
+        self.current = {}
+
+    def get_dataframe(self):
+        return pd.DataFrame(self.records, columns=["tick", "key", "seconds", "calls"])
+
+    def get_summary(self):
+        # totals over every tick, slowest first
+        return (
+            self.get_dataframe()
+            .groupby("key")[["seconds", "calls"]]
+            .sum()
+            .sort_values("seconds", ascending=False)
+        )
+
+    def save(self, path):
+        # .csv for every tick, anything else gets the summary as json
+        if path.endswith(".csv"):
+            self.get_dataframe().to_csv(path, index=False)
+            return
+        with open(path, "w") as file:
+            json.dump(self.get_summary().to_dict(orient="index"), file, indent=2)
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from functools import lru_cache
+import pandas as pd
+from src.metrics_export import ChunkedMetricsReader
+
+
+def read_run_steps(results_path):
+    # {run id: steps collected} of a results file: a sweep's sqlite file (see
+    # sweep.py) or a ChunkedMetricsWriter directory, which holds one run (0)
+    if os.path.isdir(results_path):
+        return {0: len(read_run(results_path, 0))}
+    connection = sqlite3.connect(results_path)
+    rows = connection.execute(
+        "SELECT run_id, COUNT(*) FROM model_vars GROUP BY run_id ORDER BY run_id"
+    ).fetchall()
+    connection.close()
+    return dict(rows)
+
+
+@lru_cache(maxsize=16)
+def read_run(results_path, run_id):
+    # one run's collected model level values, indexed by step. cached, since
+    # the server reads the same run again on every reset
+    if os.path.isdir(results_path):
+        return ChunkedMetricsReader(results_path).get_dataframe()
+    connection = sqlite3.connect(results_path)
+    model_vars = pd.read_sql(
+        "SELECT * FROM model_vars WHERE run_id = ? ORDER BY step",
+        connection,
+        params=(run_id,),
+        index_col="step",
+    ).drop(columns="run_id")
+    connection.close()
+    if model_vars.empty:
+        raise Exception(f"no run {run_id} in {results_path}")
+    return model_vars
+
+
+class ReplayDataCollector:
+    # the part of mesa's DataCollector the charts read
+    def __init__(self, labels):
+        self.model_vars = {label: [] for label in labels}
+
+
+class ReplayModel:
+    # stands in for MacroModel in the server to show a stored run instead of
+    # simulating one: each step reveals the next collected row. it starts at
+    # start_step with everything before it already shown, so picking another
+    # start step and resetting scrubs through the run
+
+    def __init__(self, results_path, run_id=0, start_step=0):
+        model_vars = read_run(results_path, int(run_id))
+        self.columns = {label: model_vars[label].tolist() for label in model_vars}
+        self.size = len(model_vars)
+        self.datacollector = ReplayDataCollector(self.columns)
+        self.running = True
+
+        self.steps = min(int(start_step), self.size - 1)
+        for label, values in self.columns.items():
+            self.datacollector.model_vars[label] = values[: self.steps + 1]
+
+    def step(self):
+        if self.steps + 1 >= self.size:
+            self.running = False
+            return
+        self.steps += 1
+        for label, values in self.columns.items():
+            self.datacollector.model_vars[label].append(values[self.steps])
+        self.running = self.steps + 1 < self.size
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from functools import partial
+from mesa.time import BaseScheduler
+import mesa
+
+
+class RegistryScheduler(BaseScheduler):
+    # same activation order as BaseScheduler, but also keeps every agent filed
+    # under its class and all of its agent base classes (so Firm holds every
+    # LargeFirm, MediumFirm and SmallFirm) in the order they were added
+
+    def __init__(self, model):
+        super().__init__(model)
+        self.agents_by_class = defaultdict(list)
+
+    @staticmethod
+    def agent_classes(agent):
+        return [
+            agent_class
+            for agent_class in type(agent).__mro__
+            if issubclass(agent_class, mesa.Agent)
+        ]
+
+    def add(self, agent):
+        super().add(agent)
+        self.register(agent)
+
+    def register(self, agent):
+        # files an agent in the registry (and group totals) without scheduling
+        # it, for agents that are stepped some other way
+        for agent_class in self.agent_classes(agent):
+            self.agents_by_class[agent_class].append(agent)
+        if self.model.group_totals is not None:
+            self.model.group_totals.add(agent)
+
+    def remove(self, agent):
+        super().remove(agent)
+        for agent_class in self.agent_classes(agent):
+            self.agents_by_class[agent_class].remove(agent)
+        if self.model.group_totals is not None:
+            self.model.group_totals.remove(agent)
+
+
+class Event:
+    def __init__(self, action, agent_key, interval, order, sequence):
+        self.action = action
+        self.agent_key = agent_key
+        # ticks between runs, None for a one off event
+        self.interval = interval
+        # events of the same agent due on the same tick run by order, then in
+        # the order they were first scheduled
+        self.sort_key = (order, sequence)
+        self.cancelled = False
+
+
+class EventScheduler(RegistryScheduler):
+    # RegistryScheduler with an event calendar: periodic and one off actions
+    # are filed under the tick they are next due, so on every tick only the
+    # actions that are actually due get touched instead of every agent polling
+    # time_due. agents run their own due events from step() with
+    # run_due_events(self). model level events (agent None, ex: a one off
+    # policy shock) are run by MacroModel.step before anything else
+
+    def __init__(self, model):
+        super().__init__(model)
+        # tick -> agent unique id (None for the model) -> events
+        self.calendar = defaultdict(partial(defaultdict, list))
+        self.event_count = 0
+
+    def schedule_event(self, time, action, agent=None, interval=None, order=0):
+        if time < self.time:
+            raise Exception(f"can't schedule an event at {time}, it is already {self.time}")
+
+        agent_key = None if agent is None else agent.unique_id
+        event = Event(action, agent_key, interval, order, self.event_count)
+        self.event_count += 1
+        self.calendar[time][agent_key].append(event)
+        return event
+
+    def schedule_periodic(self, start, interval, action, agent=None, order=0):
+        # due at start, start + interval, ... (like utils.time_due), from the
+        # first of those that hasn't passed yet
+        if start < self.time:
+            start += -(-(self.time - start) // interval) * interval
+        return self.schedule_event(start, action, agent, interval, order)
+
+    def cancel(self, event):
+        event.cancelled = True
+
+    def run_due_events(self, agent=None):
+        agent_key = None if agent is None else agent.unique_id
+        due_events = self.calendar.get(self.time)
+        if due_events is None:
+            return
+        events = due_events.pop(agent_key, None)
+        if events is None:
+            return
+
+        if len(events) > 1:
+            events.sort(key=lambda event: event.sort_key)
+        for event in events:
+            if event.cancelled:
+                continue
+            event.action()
+            if event.interval is not None and not event.cancelled:
+                self.calendar[self.time + event.interval][agent_key].append(event)
+
+    def step(self):
+        super().step()
+
+        # anything still filed under the tick that just ended was scheduled
+        # for an agent after it had already stepped, and would never run
+        for agent_key, events in self.calendar.pop(self.time - 1, {}).items():
+            if agent_key is not None and agent_key not in self._agents:
+                continue
+            if any(not event.cancelled for event in events):
+                raise Exception(
+                    f"events for agent {agent_key} at tick {self.time - 1} were never run"
+                )
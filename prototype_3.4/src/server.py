@@ -1,11 +1,13 @@
 import mesa
-from mesa.visualization.modules import ChartModule
+from src.chart_stream import StreamingChartModule
 from src.model import MacroModel
+from src.model_log import INFO, ModelLog, PrintSink
+from src.replay import ReplayModel, read_run_steps
 
 HOUSEHOLD_COLORS = ["#2596be", "#e28743", "#21130d"]
 FIRM_COLORS = ["#12fe1e", "#f14b5a", "#000000"]
 
-chart = ChartModule(
+chart = StreamingChartModule(
     [
         # {"Label": "Bank Money", "Color": "#2ca02c"},
         {"Label": "Large Firm Avg Money", "Color": FIRM_COLORS[2]},
@@ -14,7 +16,7 @@ chart = ChartModule(
     ]
 )
 
-chart2 = ChartModule(
+chart2 = StreamingChartModule(
     [
         {"Label": "Education 1 Avg Money", "Color": HOUSEHOLD_COLORS[0]},
         {"Label": "Education 2 Avg Money", "Color": HOUSEHOLD_COLORS[1]},
@@ -25,7 +27,7 @@ chart2 = ChartModule(
     ]
 )
 
-chart3 = ChartModule(
+chart3 = StreamingChartModule(
     [
         {"Label": "Large Firm Avg Goods", "Color": FIRM_COLORS[2]},
         {"Label": "Medium Firm Avg Goods", "Color": FIRM_COLORS[1]},
@@ -33,19 +35,56 @@ chart3 = ChartModule(
     ]
 )
 
-chart4 = ChartModule(
+chart4 = StreamingChartModule(
     [
         {"Label": "Inflation Rate", "Color": "#000000"},
         {"Label": "Compounded Inflation Rate", "Color": "#606060"},
     ]
 )
 
+CHARTS = [chart, chart2, chart3, chart4]
+
 total_steps = 100
 
-server = mesa.visualization.ModularServer(
-    MacroModel,
-    [chart, chart2, chart3, chart4],
-    "Macro Model",
-    {"total_steps": total_steps},
-)
-server.port = 8520
+
+def get_chart_labels(charts):
+    return list(
+        dict.fromkeys(series["Label"] for chart in charts for series in chart.series)
+    )
+
+
+def get_server():
+    server = mesa.visualization.ModularServer(
+        MacroModel,
+        CHARTS,
+        "Macro Model",
+        {
+            "total_steps": total_steps,
+            "log": ModelLog(INFO, [PrintSink()]),
+            # only what the charts show is collected
+            "labels": get_chart_labels(CHARTS),
+        },
+    )
+    server.port = 8520
+    return server
+
+
+def get_replay_server(results_path):
+    # the same charts over a stored run (see replay.py), no model is built.
+    # pick the run and the step to start from, then reset
+    run_steps = read_run_steps(results_path)
+    run_ids = [str(run_id) for run_id in run_steps]
+    server = mesa.visualization.ModularServer(
+        ReplayModel,
+        CHARTS,
+        "Macro Model (replay)",
+        {
+            "results_path": results_path,
+            "run_id": mesa.visualization.Choice("Run", run_ids[0], run_ids),
+            "start_step": mesa.visualization.Slider(
+                "Start at step", 0, 0, max(run_steps.values()) - 1
+            ),
+        },
+    )
+    server.port = 8520
+    return server
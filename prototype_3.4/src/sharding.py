@@ -0,0 +1,389 @@
+import multiprocessing
+import mesa
+import numpy as np
+from src.agents import BaseAgent, Bank, Government, SmallFirm
+from src.deposits import DepositBook
+from src.draws import ModelDraws
+from src.households import HouseholdPopulation
+from src.labor import LaborMarket
+from src.ledger import Ledger
+from src.model_log import ModelLog
+from src.scheduler import EventScheduler
+from src.utils import get
+
+
+class BlockPopulation(HouseholdPopulation):
+    # the households of one shard (households start to start + size of the
+    # model). small firms pay wages by model wide household index, so wages
+    # for workers in other shards are put aside for the main model to route
+
+    def __init__(self, unique_id, model, educations, start):
+        super().__init__(unique_id, model, educations)
+        self.start = start
+        self.remote_workers = []
+        self.remote_wages = []
+
+    def pay_wages(self, firm, workers, wage):
+        workers = np.asarray(workers)
+        local = (workers >= self.start) & (workers < self.start + self.size)
+        super().pay_wages(firm, workers[local] - self.start, wage)
+        if not local.all():
+            remote = workers[~local]
+            firm.money -= wage * len(remote)
+            self.remote_workers.append(remote)
+            self.remote_wages.append(np.full(len(remote), wage))
+
+    def set_goods_requirement(self):
+        # every shard has a copy of the model's generator and draws for the
+        # whole economy, keeping its own households' share. the draws are the
+        # vector engine's, however the small firms are split into shards
+        draws = self.model.draw_goods_requirements(self.model.config.num_households)
+        self.goods_requirement = draws[self.start : self.start + self.size]
+
+    def pop_remote_wages(self):
+        if not self.remote_workers:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        workers = np.concatenate(self.remote_workers)
+        wages = np.concatenate(self.remote_wages)
+        self.remote_workers = []
+        self.remote_wages = []
+        return workers, wages
+
+
+class ShardModel(ModelDraws, mesa.Model):
+    # what one worker process runs: a block of small firms and the households
+    # they sell to, with the real SmallFirm and HouseholdPopulation code. the
+    # government and bank here only collect what the block pays them each
+    # tick, which is sent back to the main model and then cleared
+
+    def __init__(
+        self,
+        config,
+        government_unique_id,
+        bank_unique_id,
+        household_unique_id,
+        household_range,
+        educations,
+        firm_unique_ids,
+        firm_ranges,
+        rng,
+    ):
+        super().__init__()
+        self.config = config
+        self.rng = rng
+        self.log = ModelLog()
+        self.group_totals = None
+        self.total_money = 0
+        self.schedule = EventScheduler(self)
+        self.labor_market = LaborMarket()
+        self.ledger = Ledger()
+
+        self.government = Government(government_unique_id, self)
+        self.bank = Bank(bank_unique_id, self)
+        self.government.money = 0
+        self.bank.money = 0
+        self.schedule.register(self.government)
+        self.schedule.register(self.bank)
+
+        start, stop = household_range
+        self.household_population = BlockPopulation(
+            household_unique_id + start, self, educations[start:stop], start
+        )
+        self.schedule.register(self.household_population)
+
+        self.firms = []
+        for unique_id, (first, last) in zip(firm_unique_ids, firm_ranges):
+            firm = SmallFirm(unique_id, self, [first - start, last - start])
+            # the main model does the hiring
+            for event in self.schedule.calendar[0][unique_id]:
+                if event.action == firm.init_employees:
+                    self.schedule.cancel(event)
+            self.schedule.register(firm)
+            self.firms.append(firm)
+
+        for agent in [self.government, self.bank, *self.firms, self.household_population]:
+            agent.get_references()
+        for firm in self.firms:
+            firm.aggregate_demand()
+
+    def add_wages(self, workers, wages):
+        self.household_population.money[workers - self.household_population.start] += (
+            wages
+        )
+
+    def start_tick(self, time, compounded_inflation_rate, wages, firm_states, employees):
+        # the small firm phase: selling to households, exporting and paying
+        # wages. returns the wages owed to workers of other shards
+        self.schedule.time = time
+        self.schedule.steps = time
+        self.government.compounded_inflation_rate = compounded_inflation_rate
+        self.add_wages(*wages)
+
+        for firm, (money, goods) in zip(self.firms, firm_states):
+            firm.money = money
+            firm.goods = goods
+        if employees is not None:
+            for firm, firm_employees in zip(self.firms, employees):
+                firm.employees = [list(workers) for workers in firm_employees]
+                firm.employee_counts = [len(workers) for workers in firm_employees]
+                firm.clear_workforce_cache()
+
+        for firm in self.firms:
+            firm.step()
+        return self.household_population.pop_remote_wages()
+
+    def finish_tick(self, wages):
+        # the household phase, then next tick's demand of the small firms
+        self.add_wages(*wages)
+        self.household_population.step()
+        for firm in self.firms:
+            firm.aggregate_demand()
+        self.schedule.calendar.pop(self.schedule.time, None)
+        return self.get_summary()
+
+    def get_summary(self):
+        deposits = self.bank.deposits
+        summary = {
+            "government_money": self.government.money,
+            "total_money_provided": self.government.total_money_provided,
+            "total_money": self.total_money,
+            "bank_money": self.bank.money,
+            "deposit_ids": deposits.owner[: deposits.count].copy(),
+            "deposit_amounts": deposits.amount[: deposits.count].copy(),
+            "firms": [(firm.money, firm.goods, firm.goods_demand) for firm in self.firms],
+            "group_totals": self.household_population.get_group_totals(),
+        }
+
+        # the main model adds these to its own, start over for the next tick
+        self.government.money = 0
+        self.government.total_money_provided = 0
+        self.total_money = 0
+        self.bank.money = 0
+        self.bank.deposits = DepositBook(self.config.compound_interval)
+        return summary
+
+
+def run_shard(connection, arguments):
+    # a worker process: builds its ShardModel, then runs whatever the main
+    # model asks for until it is told to close
+    shard = None
+    try:
+        shard = ShardModel(*arguments)
+        connection.send(("ok", shard.get_summary()))
+    except Exception as exception:
+        connection.send(("error", str(exception)))
+
+    while True:
+        message, payload = connection.recv()
+        if message == "close":
+            connection.close()
+            return
+        try:
+            connection.send(("ok", getattr(shard, message)(*payload)))
+        except Exception as exception:
+            connection.send(("error", str(exception)))
+
+
+class ShardedEconomy(BaseAgent):
+    # stands in for the small firms and households of a MacroModel with
+    # household_engine="sharded". each small firm and its customers are a
+    # block, and blocks are split over worker processes (ShardModel) that run
+    # the small firm and household phases in parallel. per tick the main
+    # model sends each shard the inflation rate, wages paid by large and
+    # medium firms and what medium firms sold its small firms, and gets back
+    # what its households and firms paid the government and bank, deposits,
+    # household totals and the small firms' money, goods and demand.
+    #
+    # the small firms are mirrored in the main model (registered, never
+    # stepped) so medium firms can sell to them and reporters can read them.
+    # every shard makes the vector engine's random draws (see
+    # BlockPopulation.set_goods_requirement), so a seeded run gives the
+    # vector engine's data for any number of shards, up to the order running
+    # totals are added in. wages small firms pay to workers in other shards
+    # arrive after those shards' small firms have sold goods, which only
+    # matters to a household that can't pay for its goods without them
+
+    def __init__(self, unique_id, model, educations, small_firms, shards):
+        super().__init__(unique_id, model)
+        self.size = len(educations)
+        self.educations = educations
+        self.small_firms = small_firms
+
+        self.employed = np.zeros(self.size, dtype=bool)
+        # unique id of each household's employer, -1 when unemployed
+        self.employer = np.full(self.size, -1)
+        education = np.array(educations)
+        for level in range(3):
+            model.labor_market.add_many(np.flatnonzero(education == level).tolist(), level)
+
+        # wages owed to each household, sent to its shard at the next barrier
+        self.wages = np.zeros(self.size)
+
+        self.firm_blocks = [
+            block.tolist()
+            for block in np.array_split(
+                np.arange(len(small_firms)), min(shards, len(small_firms))
+            )
+        ]
+        self.household_ranges = [
+            (
+                small_firms[block[0]].customer_range[0],
+                small_firms[block[-1]].customer_range[1],
+            )
+            for block in self.firm_blocks
+        ]
+        self.connections = []
+        self.processes = []
+        self.closed = False
+        self.group_totals_by_shard = []
+
+    def get_references(self):
+        self.bank = get(self.model, Bank)
+        self.government = get(self.model, Government)
+        for firm in self.small_firms:
+            firm.get_references()
+        self.start()
+
+    def start(self):
+        # each shard gets a copy of the model's generator, the main model draws
+        # nothing once it is sharded
+        for shard, block in enumerate(self.firm_blocks):
+            arguments = (
+                self.model.config,
+                self.government.unique_id,
+                self.bank.unique_id,
+                self.unique_id,
+                self.household_ranges[shard],
+                self.educations,
+                [self.small_firms[i].unique_id for i in block],
+                [self.small_firms[i].customer_range for i in block],
+                self.model.rng,
+            )
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_shard,
+                args=(worker_connection, arguments),
+                daemon=True,
+            )
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        self.apply_summaries(
+            [self.receive(connection) for connection in self.connections]
+        )
+
+    def close(self):
+        for connection, process in zip(self.connections, self.processes):
+            try:
+                connection.send(("close", ()))
+            except OSError:
+                # the worker has already exited
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            connection.close()
+        self.connections = []
+        self.processes = []
+        self.closed = True
+
+    def receive(self, connection):
+        status, payload = connection.recv()
+        if status == "error":
+            self.close()
+            raise Exception(payload)
+        return payload
+
+    def employ(self, worker, firm):
+        self.employed[worker] = True
+        self.employer[worker] = firm.unique_id
+
+    def unemploy(self, worker):
+        self.employed[worker] = False
+        self.employer[worker] = -1
+
+    def pay_wages(self, firm, workers, wage):
+        firm.money -= wage * len(workers)
+        self.wages[workers] += wage
+
+    def pop_wages(self, shard):
+        start, stop = self.household_ranges[shard]
+        workers = np.flatnonzero(self.wages[start:stop]) + start
+        return workers, self.wages[workers]
+
+    def get_group_totals(self):
+        group_totals = {}
+        for shard_group_totals in self.group_totals_by_shard:
+            for key, (count, sums) in shard_group_totals.items():
+                total_count, total_sums = group_totals.get(key, (0, {}))
+                group_totals[key] = (
+                    total_count + count,
+                    {
+                        name: total_sums.get(name, 0) + total
+                        for name, total in sums.items()
+                    },
+                )
+        return group_totals
+
+    def apply_summaries(self, summaries):
+        for summary in summaries:
+            self.government.money += summary["government_money"]
+            self.government.total_money_provided += summary["total_money_provided"]
+            self.model.total_money += summary["total_money"]
+            self.bank.money += summary["bank_money"]
+
+        deposit_ids = np.concatenate([summary["deposit_ids"] for summary in summaries])
+        if len(deposit_ids):
+            self.bank.deposits.add_many(
+                deposit_ids,
+                np.concatenate([summary["deposit_amounts"] for summary in summaries]),
+                self.model.schedule.time,
+            )
+
+        for block, summary in zip(self.firm_blocks, summaries):
+            for i, (money, goods, goods_demand) in zip(block, summary["firms"]):
+                firm = self.small_firms[i]
+                firm.money = money
+                firm.goods = goods
+                firm.goods_demand = goods_demand
+        self.group_totals_by_shard = [summary["group_totals"] for summary in summaries]
+
+    def step(self):
+        if self.closed:
+            raise Exception("the sharded economy's workers have been closed")
+        time = self.model.schedule.time
+        if time == 0:
+            for firm in self.small_firms:
+                firm.init_employees()
+
+        for shard, connection in enumerate(self.connections):
+            block = [self.small_firms[i] for i in self.firm_blocks[shard]]
+            connection.send(
+                (
+                    "start_tick",
+                    (
+                        time,
+                        self.government.compounded_inflation_rate,
+                        self.pop_wages(shard),
+                        [(firm.money, firm.goods) for firm in block],
+                        [firm.employees for firm in block] if time == 0 else None,
+                    ),
+                )
+            )
+        self.wages[:] = 0
+
+        # barrier: wages small firms paid to workers of other shards
+        for connection in self.connections:
+            workers, wages = self.receive(connection)
+            np.add.at(self.wages, workers, wages)
+
+        for shard, connection in enumerate(self.connections):
+            connection.send(("finish_tick", (self.pop_wages(shard),)))
+        self.wages[:] = 0
+
+        # barrier: everything the households and small firms did this tick
+        self.apply_summaries(
+            [self.receive(connection) for connection in self.connections]
+        )
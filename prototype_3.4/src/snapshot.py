@@ -0,0 +1,107 @@
+import io
+import os
+import pickle
+import struct
+import zlib
+import mesa
+
+# bump whenever the state of a model changes shape, snapshots from another
+# version are refused instead of being restored wrong
+SNAPSHOT_VERSION = 7
+MAGIC = b"MACROSNAP"
+HEADER = struct.Struct("<H")
+
+
+class SnapshotPickler(pickle.Pickler):
+    # agents are pickled once each, in a flat table, and stored by unique id
+    # everywhere they are referred to (the scheduler, other agents, events,
+    # the labor market, ...). pickling an agent where it is first met would
+    # follow its employer, customers and stores through the whole economy,
+    # deeper than python's recursion limit past a few thousand households
+
+    def __init__(self, file, agents):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.agent_ids = {id(agent): agent.unique_id for agent in agents}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, mesa.Agent):
+            return self.agent_ids.get(id(obj))
+        return None
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.agents = {}
+
+    def persistent_load(self, unique_id):
+        return self.agents[unique_id]
+
+
+def get_state(agent):
+    # what pickle would store of the agent (its instance dict and slots)
+    return agent.__reduce_ex__(pickle.HIGHEST_PROTOCOL)[2]
+
+
+def set_state(agent, state):
+    # what unpickling does with that state, see get_state
+    if isinstance(state, tuple):
+        state, slot_state = state
+    else:
+        slot_state = None
+    if state:
+        agent.__dict__.update(state)
+    if slot_state:
+        for name, value in slot_state.items():
+            setattr(agent, name, value)
+
+
+def dump_model(model):
+    # the whole object graph of the model (agents, schedule and event
+    # calendar, loans, deposits, collected data, random generator, ...),
+    # pickled and compressed behind a versioned header: every agent's class,
+    # then every agent's state, then the model
+    agents = model.schedule.agents_by_class.get(mesa.Agent, [])
+    file = io.BytesIO()
+    pickler = SnapshotPickler(file, agents)
+    pickler.dump([(agent.unique_id, type(agent)) for agent in agents])
+    pickler.dump([get_state(agent) for agent in agents])
+    pickler.dump(model)
+    body = zlib.compress(file.getvalue(), 1)
+    return MAGIC + HEADER.pack(SNAPSHOT_VERSION) + body
+
+
+def load_model(data):
+    if not data.startswith(MAGIC):
+        raise Exception("not a model snapshot")
+    (version,) = HEADER.unpack_from(data, len(MAGIC))
+    if version != SNAPSHOT_VERSION:
+        raise Exception(
+            f"snapshot is version {version}, this model reads version {SNAPSHOT_VERSION}"
+        )
+
+    unpickler = SnapshotUnpickler(
+        io.BytesIO(zlib.decompress(data[len(MAGIC) + HEADER.size :]))
+    )
+    # every agent is made empty first, so the states can link to any of them
+    classes = unpickler.load()
+    unpickler.agents = {
+        unique_id: agent_class.__new__(agent_class) for unique_id, agent_class in classes
+    }
+    for (unique_id, _), state in zip(classes, unpickler.load()):
+        set_state(unpickler.agents[unique_id], state)
+    return unpickler.load()
+
+
+def save_snapshot(model, path):
+    # written next to path first, so a crash while saving leaves the previous
+    # snapshot intact
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(dump_model(model))
+    os.replace(temporary_path, path)
+
+
+def load_snapshot(path):
+    with open(path, "rb") as file:
+        return load_model(file.read())
@@ -0,0 +1,153 @@
+import itertools
+import json
+import multiprocessing
+import sqlite3
+import time
+import pandas as pd
+from src.configuration import Configuration, DEFAULT_CONFIGURATION_PATH
+from src.model import MacroModel
+
+
+def get_scenarios(sweep):
+    # every combination of the grid values, merged into every listed scenario
+    grid = sweep.get("grid", {})
+    grid_overrides = [
+        dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())
+    ]
+    listed_overrides = sweep.get("scenarios") or [{}]
+
+    return [
+        {**listed, **grid_override}
+        for listed in listed_overrides
+        for grid_override in grid_overrides
+    ]
+
+
+def get_runs(sweep):
+    seeds = sweep.get("seeds", [None])
+    return [
+        {"run_id": run_id, "scenario": scenario, "overrides": overrides, "seed": seed}
+        for run_id, ((scenario, overrides), seed) in enumerate(
+            itertools.product(enumerate(get_scenarios(sweep)), seeds)
+        )
+    ]
+
+
+def run_scenario(run, config, household_engine, data_collection, labels=None):
+    start = time.perf_counter()
+    model = None
+    error = None
+    try:
+        model = MacroModel(
+            household_engine=household_engine,
+            data_collection=data_collection,
+            config=config,
+            seed=run["seed"],
+            labels=labels,
+        )
+        model.run_model()
+    except Exception as exception:
+        # bankruptcies and defaults end a run early, keep what was collected
+        # up to the last full step
+        error = repr(exception)
+
+    if model is None:
+        steps = 0
+        model_vars = pd.DataFrame()
+    else:
+        steps = model.schedule.steps
+        model_vars = model.datacollector.get_model_vars_dataframe()
+    return {
+        **run,
+        "steps": steps,
+        "error": error,
+        "seconds": time.perf_counter() - start,
+        "model_vars": model_vars,
+    }
+
+
+def check_household_engine(household_engine):
+    # runs are made in the worker processes of a pool, which can't start the
+    # worker processes of a sharded model
+    if household_engine == "sharded":
+        raise Exception(
+            "the sharded household engine can't run inside a process pool, use"
+            " \"vector\" for sweeps and ensembles"
+        )
+
+
+def run_scenario_star(arguments):
+    return run_scenario(*arguments)
+
+
+def write_run(connection, result):
+    connection.execute(
+        "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            result["run_id"],
+            result["scenario"],
+            result["seed"],
+            json.dumps(result["overrides"]),
+            result["steps"],
+            result["error"],
+            result["seconds"],
+        ),
+    )
+    if result["model_vars"].empty:
+        connection.commit()
+        return
+    model_vars = result["model_vars"].astype(float)
+    model_vars.insert(0, "step", model_vars.index)
+    model_vars.insert(0, "run_id", result["run_id"])
+    model_vars.to_sql("model_vars", connection, if_exists="append", index=False)
+    connection.commit()
+
+
+def run_sweep(
+    sweep,
+    output_path,
+    processes=None,
+    household_engine="object",
+    data_collection="scan",
+):
+    check_household_engine(household_engine)
+    base_config = Configuration.load(sweep.get("base", DEFAULT_CONFIGURATION_PATH))
+
+    runs = get_runs(sweep)
+    # building every configuration up front checks the overrides before any
+    # worker starts
+    configs = [base_config.with_overrides(run["overrides"]) for run in runs]
+
+    connection = sqlite3.connect(output_path)
+    connection.execute("DROP TABLE IF EXISTS runs")
+    connection.execute("DROP TABLE IF EXISTS model_vars")
+    connection.execute(
+        "CREATE TABLE runs (run_id INTEGER PRIMARY KEY, scenario INTEGER,"
+        " seed INTEGER, overrides TEXT, steps INTEGER, error TEXT, seconds REAL)"
+    )
+
+    arguments = [
+        (run, config, household_engine, data_collection, sweep.get("labels"))
+        for run, config in zip(runs, configs)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(run_scenario_star, arguments):
+            write_run(connection, result)
+            print(
+                f"run {result['run_id'] + 1}/{len(runs)}: {result['steps']} steps"
+                f" in {result['seconds']:.2f}s"
+                + (f" ({result['error']})" if result["error"] else "")
+            )
+
+    connection.close()
+
+
+def read_results(output_path):
+    connection = sqlite3.connect(output_path)
+    runs = pd.read_sql("SELECT * FROM runs", connection, index_col="run_id")
+    runs["overrides"] = runs["overrides"].apply(json.loads)
+    model_vars = pd.read_sql(
+        "SELECT * FROM model_vars", connection, index_col=["run_id", "step"]
+    )
+    connection.close()
+    return runs, model_vars
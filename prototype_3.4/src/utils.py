@@ -11,21 +11,20 @@ def test_is_whole():
 
 
 def get_all(model, agent_class):
-    agents = []
-    for agent in model.schedule.agents:
-        if isinstance(agent, agent_class):
-            agents.append(agent)
+    # the scheduler's registry list is returned as is, so callers should slice
+    # or copy it rather than mutate it
+    agents = model.schedule.agents_by_class.get(agent_class)
 
-    if len(agents) > 0:
+    if agents:
         return agents
     # elif len(agents) == 0:
     raise Exception(f"uh oh none of agent {agent_class.__name__} found in model")
 
 
 def get(model, agent_class):
-    for agent in model.schedule.agents:
-        if isinstance(agent, agent_class):
-            return agent
+    agents = model.schedule.agents_by_class.get(agent_class)
+    if agents:
+        return agents[0]
     raise Exception(f"uh oh none of agent {agent_class.__name__} found in model")
 
 
@@ -56,7 +55,8 @@ def split_agents(num_agents, num_managers):
     ]
 
 def get_firm_type_string(firm):
-    class_name = firm.__class__.__name__
+    # compact variants (compact_agents.py) count as the firm they extend
+    class_name = firm.__class__.__name__.removeprefix("Compact")
     return class_name[:-4].upper()
 
 
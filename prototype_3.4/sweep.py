@@ -0,0 +1,26 @@
+import argparse
+import yaml
+from src.sweep import run_sweep
+
+parser = argparse.ArgumentParser(
+    description="run every scenario of a sweep file headless, across a process pool"
+)
+parser.add_argument("sweep", help="sweep file, see src/sweep.yaml")
+parser.add_argument("--output", default="results.sqlite")
+parser.add_argument("--processes", type=int, default=None, help="defaults to all cores")
+parser.add_argument("--household-engine", default="object")
+parser.add_argument("--data-collection", default="scan")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    with open(args.sweep, "r") as file:
+        sweep = yaml.safe_load(file)
+
+    run_sweep(
+        sweep,
+        args.output,
+        processes=args.processes,
+        household_engine=args.household_engine,
+        data_collection=args.data_collection,
+    )
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the model reads src/configuration.yaml relative to the prototype directory
+PROTOTYPE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROTOTYPE_DIRECTORY)
+os.chdir(PROTOTYPE_DIRECTORY)
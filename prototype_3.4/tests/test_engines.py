@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from src.configuration import load_default_configuration
+from src.model import MacroModel
+
+STEPS = 30
+
+# the default economy, and one where every household of an education level
+# needs the same goods, so many households have the same money
+CONFIGS = {
+    "default": {},
+    "equal households": {"WEEKLY_GOODS_CONSUMPTION_RANGE": 0},
+}
+
+
+def run(config, **kwargs):
+    model = MacroModel(
+        seed=7,
+        total_steps=STEPS,
+        config=load_default_configuration().with_overrides(CONFIGS[config]),
+        **kwargs,
+    )
+    model.run_model()
+    return model.datacollector.get_model_vars_dataframe()
+
+
+@pytest.fixture(scope="module", params=list(CONFIGS))
+def config(request):
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def reference(config):
+    return run(
+        config, household_engine="object", data_collection="scan", agent_layout="dict"
+    )
+
+
+@pytest.mark.parametrize(
+    "household_engine, data_collection, agent_layout",
+    [
+        ("object", "incremental", "dict"),
+        ("object", "scan", "slots"),
+        ("object", "incremental", "slots"),
+        ("vector", "scan", "dict"),
+        ("vector", "incremental", "dict"),
+    ],
+)
+def test_every_mode_collects_the_same_data(
+    config, reference, household_engine, data_collection, agent_layout
+):
+    # the household engines, data collection modes and agent layouts are
+    # ways of running the same model: for one seed they collect the same
+    # data, up to the order sums are added up in
+    frame = run(
+        config,
+        household_engine=household_engine,
+        data_collection=data_collection,
+        agent_layout=agent_layout,
+    )
+    assert len(frame) == len(reference) == STEPS + 1
+    assert list(frame.columns) == list(reference.columns)
+    assert np.allclose(frame, reference, rtol=1e-9)
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from src.agents import Bank, Household
+from src.model import MacroModel
+from src.utils import get
+
+LOANS = {0: 100.0, 5: 50.0}
+
+
+def get_household_money(model, index):
+    if model.household_population is not None:
+        return float(model.household_population.money[index])
+    return model.schedule.agents_by_class[Household][index].money
+
+
+def make_loans(model):
+    bank = get(model, Bank)
+    if model.household_population is not None:
+        bank.loan_to_population(np.array(list(LOANS)), np.array(list(LOANS.values())))
+    else:
+        households = model.schedule.agents_by_class[Household]
+        for index, amount in LOANS.items():
+            bank.loan(households[index], amount)
+
+
+@pytest.mark.parametrize("household_engine", ["object", "vector"])
+def test_loans_compound_and_are_repaid(household_engine):
+    # the same economy with and without two loans made on tick 0. a loan is
+    # demanded once it has been out for LOAN_TICKS (8) ticks, on tick 9, and
+    # compounds every COMPOUND_INTERVAL (4) ticks before that, on ticks 4 and 8
+    with_loans = MacroModel(household_engine=household_engine, seed=1)
+    without_loans = MacroModel(household_engine=household_engine, seed=1)
+    config = with_loans.config
+    bank = get(with_loans, Bank)
+    bank_money = bank.money
+
+    make_loans(with_loans)
+    assert len(bank.loans) == len(LOANS)
+    assert bank.money == pytest.approx(bank_money - sum(LOANS.values()))
+
+    for tick in range(10):
+        for index, amount in LOANS.items():
+            lent = get_household_money(with_loans, index) - get_household_money(
+                without_loans, index
+            )
+            assert lent == pytest.approx(amount)
+        with_loans.step()
+        without_loans.step()
+
+        if tick < 9:
+            compounds = tick // config.compound_interval
+            owed = sorted(bank.loans.amount[bank.loans.active])
+            assert owed == pytest.approx(
+                sorted(
+                    amount * (1 + config.monthly_interest_rate) ** compounds
+                    for amount in LOANS.values()
+                )
+            )
+
+    # repaid with two compounds of interest, and off the book
+    interest = (1 + config.monthly_interest_rate) ** 2 - 1
+    assert len(bank.loans) == 0
+    assert not bank.loans.active.any()
+    assert bank.money == pytest.approx(bank_money + sum(LOANS.values()) * interest)
+    for index, amount in LOANS.items():
+        paid = get_household_money(with_loans, index) - get_household_money(
+            without_loans, index
+        )
+        assert paid == pytest.approx(-amount * interest)
+
+
+def test_loan_is_repaid_from_a_deposit():
+    # a household with a big enough deposit repays out of it, and keeps the
+    # money it was lent
+    models = [MacroModel(household_engine="vector", seed=1) for _ in range(2)]
+    for model in models:
+        get(model, Bank).add_deposit(int(model.household_population.unique_ids[3]), 500.0)
+    with_loan, without_loan = models
+    get(with_loan, Bank).loan_to_population(np.array([3]), np.array([100.0]))
+    for _ in range(10):
+        for model in models:
+            model.step()
+
+    deposits = [
+        float(get(model, Bank).deposits.get(int(model.household_population.unique_ids[3])))
+        for model in models
+    ]
+    owed = 100.0 * (1 + with_loan.config.monthly_interest_rate) ** 2
+    assert len(get(with_loan, Bank).loans) == 0
+    assert deposits[0] - deposits[1] == pytest.approx(-owed)
+    assert get_household_money(with_loan, 3) - get_household_money(
+        without_loan, 3
+    ) == pytest.approx(100.0)
@@ -0,0 +1,62 @@
+import gc
+import multiprocessing
+import numpy as np
+import pytest
+from src.ensemble import run_ensemble
+from src.model import MacroModel
+from src.sweep import run_sweep
+
+
+def make_model(shards=2, **kwargs):
+    return MacroModel(
+        household_engine="sharded", data_collection="incremental", shards=shards, **kwargs
+    )
+
+
+def test_workers_stop_when_construction_fails():
+    with pytest.raises(Exception, match="unknown metrics"):
+        make_model(labels=["not a metric"])
+    assert multiprocessing.active_children() == []
+
+
+def test_workers_stop_at_the_end_of_a_with_block():
+    with make_model(seed=1) as model:
+        model.step()
+        assert len(multiprocessing.active_children()) == 2
+    assert multiprocessing.active_children() == []
+    with pytest.raises(Exception, match="closed"):
+        model.step()
+
+
+def test_workers_stop_when_a_model_is_dropped():
+    model = make_model(seed=1)
+    model.step()
+    del model
+    gc.collect()
+    assert multiprocessing.active_children() == []
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3])
+def test_any_number_of_shards_runs_like_the_vector_engine(shards):
+    # every shard draws what the vector engine draws, so the seeded run is
+    # the same whatever the shard count. only the order running totals are
+    # added up in differs
+    frames = []
+    for model in [
+        MacroModel(household_engine="vector", data_collection="incremental", seed=7),
+        make_model(seed=7, shards=shards),
+    ]:
+        model.total_steps = 20
+        model.run_model()
+        frames.append(model.datacollector.get_model_vars_dataframe())
+    vector, sharded = frames
+    assert list(vector.columns) == list(sharded.columns)
+    assert np.allclose(vector, sharded, rtol=1e-9)
+
+
+def test_sweeps_and_ensembles_refuse_the_sharded_engine(tmp_path):
+    # their runs are pool workers, which can't start a sharded model's workers
+    with pytest.raises(Exception, match="process pool"):
+        run_ensemble(2, household_engine="sharded")
+    with pytest.raises(Exception, match="process pool"):
+        run_sweep({}, tmp_path / "sweep.sqlite", household_engine="sharded")
@@ -0,0 +1,37 @@
+from src.agents import Household, SmallFirm
+from src.benchmark import get_scaled_configuration
+from src.configuration import load_default_configuration
+from src.model import MacroModel
+
+
+def test_large_object_model_resumes_from_a_snapshot(tmp_path):
+    # 10,080 households as Household agents, linked to each other through
+    # their employers, stores and customers
+    _, config = get_scaled_configuration(load_default_configuration(), 10_080)
+    assert config.num_households >= 10_000
+    model = MacroModel(config=config, household_engine="object", seed=1, total_steps=5)
+    model.run_model()
+
+    path = tmp_path / "model.snap"
+    model.save_snapshot(path)
+    restored = MacroModel.load_snapshot(path)
+
+    # links between agents point at the restored agents, not copies of them
+    households = restored.schedule.agents_by_class[Household]
+    stores = restored.schedule.agents_by_class[SmallFirm]
+    assert len(households) == config.num_households
+    assert all(household.stores is stores for household in households)
+    employed = [household for household in households if household.employed]
+    assert employed
+    assert all(
+        household in household.employer.employees[household.education]
+        for household in employed
+    )
+
+    model.total_steps = restored.total_steps = 15
+    model.run_model()
+    restored.run_model()
+    assert restored.schedule.steps == model.schedule.steps == 15
+    assert restored.datacollector.get_model_vars_dataframe().equals(
+        model.datacollector.get_model_vars_dataframe()
+    )